@@ -0,0 +1,208 @@
+import glob
+import os
+import pixie
+from typing import Callable, Hashable, NoReturn
+from background import Background
+from wsymbol import WSymbol
+
+'''
+Constants
+---------
+    The default font of the AssetRegistry class and the pattern of the images
+    that are loaded in the warm up.
+'''
+ASSETS_DEFAULT_FONT = 'src/Ubuntu-Regular_1.ttf'
+ASSETS_IMAGE_PATTERN = '*.png'
+
+
+class AssetRegistry:
+    '''
+    Decodes the typeface, the condition codes, the backgrounds and the icons
+    once and hands out shared read-only copies, so the cards do not read or
+    decode any file.
+
+    Attributes
+    ----------
+        font : str
+            The path of the typeface.
+        typeface : pixie.Typeface
+            The decoded typeface, None until it is loaded.
+        wsymbol : WSymbol
+            The icons and their condition codes, None until it is loaded.
+        images : dict
+            The decoded images by absolute path, they must never be modified.
+        layers : dict
+            The images derived from the assets by key, like the backgrounds
+            with their blurred panel, they must never be modified.
+        fonts : dict
+            The fonts of the typeface by (size, color), they must never be
+            modified.
+        generation : int
+            Number of times the assets were reloaded.
+
+    Methods
+    -------
+        __init__(font=ASSETS_DEFAULT_FONT) -> NoReturn:
+            Constructor for the AssetRegistry class.
+        warm_up() -> NoReturn:
+            Loads every asset.
+        reload() -> NoReturn:
+            Drops every asset and loads them again from disk.
+        get_typeface() -> pixie.Typeface:
+            Returns the typeface.
+        get_wsymbol() -> WSymbol:
+            Returns the icons and their condition codes.
+        get_image(path: str) -> pixie.Image:
+            Returns the decoded image of a path.
+        get_layer(key, build) -> pixie.Image:
+            Returns a derived image, it is built the first time.
+        get_font(size: int, color: tuple) -> pixie.Font:
+            Returns a font of the typeface, it is built the first time.
+    '''
+
+    def __init__(self, font: str = ASSETS_DEFAULT_FONT) -> NoReturn:
+        '''
+        Constructor for the AssetRegistry class. Nothing is loaded until the
+        warm up or the first use.
+
+        Parameters
+        ----------
+            font : str
+                The path of the typeface.
+        '''
+        self.font = font
+        self.typeface = None
+        self.wsymbol = None
+        self.images = {}
+        self.layers = {}
+        self.fonts = {}
+        self.generation = 0
+
+
+    def warm_up(self) -> NoReturn:
+        '''
+        Loads the typeface, the condition codes and every background. The
+        icons are kept by the WSymbol, scaled to the sizes of the layout.
+        '''
+        self.get_wsymbol()
+        self.get_typeface()
+
+        paths = glob.glob(os.path.join(Background.BACKGROUND_UNKNOWN.get_abs_path(), ASSETS_IMAGE_PATTERN))
+        for path in paths:
+            self.get_image(path)
+
+
+    def reload(self) -> NoReturn:
+        '''
+        Drops every asset and loads them again from disk.
+        '''
+        self.typeface = None
+        self.wsymbol = None
+        self.images = {}
+        self.layers = {}
+        self.fonts = {}
+        self.generation += 1
+        self.warm_up()
+
+
+    def get_typeface(self) -> pixie.Typeface:
+        '''
+        Returns the typeface, it is loaded the first time.
+
+        Returns
+        -------
+            pixie.Typeface
+                The typeface.
+        '''
+        if self.typeface is None:
+            self.typeface = pixie.read_typeface(self.font)
+        return self.typeface
+
+
+    def get_wsymbol(self) -> WSymbol:
+        '''
+        Returns the icons and their condition codes, they are loaded the
+        first time.
+
+        Returns
+        -------
+            WSymbol
+                The icons.
+        '''
+        if self.wsymbol is None:
+            self.wsymbol = WSymbol()
+        return self.wsymbol
+
+
+    def get_image(self, path: str) -> pixie.Image:
+        '''
+        Returns the decoded image of a path, it is decoded the first time. The
+        image is shared, it must not be modified.
+
+        Parameters
+        ----------
+            path : str
+                The path of the image.
+
+        Returns
+        -------
+            pixie.Image
+                The image.
+        '''
+        path = os.path.abspath(path)
+        image = self.images.get(path)
+        if image is None:
+            image = pixie.read_image(path)
+            self.images[path] = image
+        return image
+
+
+    def get_layer(self, key: Hashable, build: Callable[[], pixie.Image]) -> pixie.Image:
+        '''
+        Returns an image derived from the assets, it is built the first time.
+        The image is shared, it must not be modified.
+
+        Parameters
+        ----------
+            key : Hashable
+                The key of the layer.
+            build : Callable[[], pixie.Image]
+                A function without arguments that builds the layer.
+
+        Returns
+        -------
+            pixie.Image
+                The layer.
+        '''
+        layer = self.layers.get(key)
+        if layer is None:
+            layer = build()
+            self.layers[key] = layer
+        return layer
+
+
+    def get_font(self, size: int, color: tuple) -> pixie.Font:
+        '''
+        Returns a font of the typeface with a size and a color, it is built
+        the first time. The font is shared, it must not be modified.
+
+        Parameters
+        ----------
+            size : int
+                The size of the font.
+            color : tuple
+                The color of the font, (red, green, blue, alpha) from 0 to 1.
+
+        Returns
+        -------
+            pixie.Font
+                The font.
+        '''
+        key = (size, color)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.get_typeface().new_font()
+            font.paint.color = pixie.Color(*color)
+            font.size = size
+            self.fonts[key] = font
+        return font
@@ -23,6 +23,22 @@ BACKGROUND_WIDTH = 800
 BACKGROUND_HEIGHT = 656
 BACKGROUND_EXTENSION = '.png'
 
+'''
+Constants
+---------
+    The image of every background, (file name, True if it is dark), by the
+    value of the Background.
+'''
+BACKGROUND_IMAGES = {0: ('unknown', False),
+                     1: ('01', False),
+                     2: ('02', True),
+                     3: ('03', False),
+                     4: ('04', True),
+                     5: ('05', True),
+                     6: ('06', True),
+                     7: ('07', True),
+                     8: ('08', False)}
+
 
 class Background(Enum):
     '''
@@ -41,9 +57,12 @@ class Background(Enum):
         get_abs_path() -> str:
             Gets the absolute path of the background directory.
 
-        get_image_path() -> str:
+        get_image_path() -> (str, bool):
             Gets the absolute path of the specified Background enum.
 
+        is_dark() -> bool:
+            Returns True if the background is dark.
+
         get_size() -> Union[int, int]:
             Gets the size of the specified Background image.
     '''
@@ -95,26 +114,20 @@ class Background(Enum):
                 The absolute path of the specified Background enum.
                 True if the background is black, False otherwise.
         '''
-        if self.value == Background.BACKGROUND_SUNNY_DAY.value:
-            return (self.get_abs_path() + '/' + '01' + BACKGROUND_EXTENSION, False)
-        if self.value == Background.BACKGROUND_SKY_NIGHT.value:
-            return (self.get_abs_path() + '/' + '02' + BACKGROUND_EXTENSION, True)
-        if self.value == Background.BACKGROUND_CLOUDY_DAY.value:
-            return (self.get_abs_path() + '/' + '03' + BACKGROUND_EXTENSION, False)
-        if self.value == Background.BACKGROUND_CLOUDY_NIGHT.value:
-            return (self.get_abs_path() + '/' + '04' + BACKGROUND_EXTENSION, True)
-        if self.value == Background.BACKGROUND_RAINY.value:
-            return (self.get_abs_path() + '/' + '05' + BACKGROUND_EXTENSION, True)
-        if self.value == Background.BACKGROUND_THUNDER.value:
-            return (self.get_abs_path() + '/' + '06' + BACKGROUND_EXTENSION, True)
-        if self.value == Background.BACKGROUND_SNOW.value:
-            return (self.get_abs_path() + '/' + '07' + BACKGROUND_EXTENSION, True)
-        if self.value == Background.BACKGROUND_FOG.value:
-            return (self.get_abs_path() + '/' + '08' + BACKGROUND_EXTENSION, False)
-        else:
-            # BACKGROUND_UNKNOWN
-            warnings.warn('Background missed.')
-            return self.get_abs_path() + '/' + 'unknown' + BACKGROUND_EXTENSION
+        (name, dark) = BACKGROUND_IMAGES[self.value]
+        return (self.get_abs_path() + '/' + name + BACKGROUND_EXTENSION, dark)
+
+
+    def is_dark(self) -> bool:
+        '''
+        Returns True if the background is dark, so the text is white.
+
+        Returns
+        -------
+            bool
+                True if the background is dark, False otherwise.
+        '''
+        return BACKGROUND_IMAGES[self.value][1]
 
 
     def get_size(self) -> Union[int, int]:
@@ -0,0 +1,290 @@
+import glob
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Hashable, NoReturn
+from weather_report import WeatherReport
+
+'''
+Constants
+---------
+    The default settings of the CardCache class.
+'''
+CARD_CACHE_DEFAULT_SIZE = 64 * 1024 * 1024
+CARD_CACHE_DEFAULT_DISK_SIZE = 512 * 1024 * 1024
+CARD_CACHE_EXTENSION = '.card'
+
+'''
+Constants
+---------
+    The fields of a WeatherReport drawn by Interface.make_imagen, two reports
+    with the same values get the same card.
+'''
+CARD_CACHE_FIELDS = ('weather_code', 'is_day', 'temperature', 'region', 'country',
+                     'weather_descriptions', 'wind_speed', 'wind_degree', 'wind_dir',
+                     'pressure', 'precip', 'humidity', 'cloudcover', 'feelslike',
+                     'uv_index', 'visibility')
+
+
+class CardCache:
+    '''
+    A content addressed cache of the encoded cards. The key is a hash of the
+    fields drawn in the card, so the reports of the same place a minute apart
+    share the card, and the rendering and the encoding are skipped. It keeps
+    the most recently used cards in memory up to a number of bytes, and the
+    evicted cards can be spilled to a directory.
+
+    The memory is only used from the event loop, get and set never touch the
+    disk. The disk is only used by spill and load, which must run in a single
+    thread.
+
+    Attributes
+    ----------
+        max_bytes : int
+            Maximum number of bytes of the cards in memory.
+        entries : OrderedDict
+            The cards in memory by key, from the least to the most recently used.
+        size : int
+            Number of bytes of the cards in memory.
+        directory : str
+            The directory where the evicted cards are spilled, None disables it.
+        max_disk_bytes : int
+            Maximum number of bytes of the cards in the directory.
+        spilled : OrderedDict
+            The size of the cards in the directory by key, from the oldest.
+        disk_size : int
+            Number of bytes of the cards in the directory.
+        hits : int
+            Number of lookups that found the card in memory.
+        disk_hits : int
+            Number of cards loaded from the directory.
+        misses : int
+            Number of lookups that did not find the card.
+
+    Methods
+    -------
+        __init__(max_bytes=CARD_CACHE_DEFAULT_SIZE, directory=None,
+                 max_disk_bytes=CARD_CACHE_DEFAULT_DISK_SIZE) -> NoReturn:
+            Constructor for the CardCache class.
+        key(report: WeatherReport, *variant) -> str:
+            Returns the key of the card of a report.
+        get(key: str) -> bytes:
+            Returns the card of a key from memory.
+        set(key: str, card: bytes) -> list:
+            Stores a card in memory and returns the evicted cards.
+        spill(cards: list) -> NoReturn:
+            Writes evicted cards to the directory.
+        load(key: str) -> bytes:
+            Returns a spilled card and removes it from the directory.
+        stats() -> dict:
+            Returns the counters of the cache.
+    '''
+
+    def __init__(self, max_bytes: int = CARD_CACHE_DEFAULT_SIZE, directory: str = None,
+                 max_disk_bytes: int = CARD_CACHE_DEFAULT_DISK_SIZE) -> NoReturn:
+        '''
+        Constructor for the CardCache class. The cards spilled by a previous
+        run are removed from the directory.
+
+        Parameters
+        ----------
+            max_bytes : int
+                Maximum number of bytes of the cards in memory.
+            directory : str
+                The directory where the evicted cards are spilled, default
+                None, they are dropped.
+            max_disk_bytes : int
+                Maximum number of bytes of the cards in the directory.
+
+        Raises
+        ------
+            AssertionError: if a size is lower than one.
+        '''
+        assert max_bytes >= 1, 'The cache needs room for one byte.'
+        assert max_disk_bytes >= 1, 'The directory needs room for one byte.'
+
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.spilled = OrderedDict()
+        self.disk_size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            for path in glob.glob(os.path.join(directory, '*' + CARD_CACHE_EXTENSION)):
+                os.remove(path)
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    @staticmethod
+    def key(report: WeatherReport, *variant: Hashable) -> str:
+        '''
+        Returns the key of the card of a report, a hash of the fields drawn in
+        the card.
+
+        Parameters
+        ----------
+            report : WeatherReport
+                The weather drawn in the card.
+            variant : Hashable
+                Other values that change the card, like the generation of the
+                assets.
+
+        Returns
+        -------
+            str
+                The key of the card.
+        '''
+        values = tuple(getattr(report, name) for name in CARD_CACHE_FIELDS) + variant
+        return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
+    def get(self, key: str) -> bytes:
+        '''
+        Returns the card of a key from memory.
+
+        Parameters
+        ----------
+            key : str
+                The key of the card.
+
+        Returns
+        -------
+            bytes
+                The card, None if it is not in memory.
+        '''
+        card = self.entries.get(key)
+        if card is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return card
+
+
+    def set(self, key: str, card: bytes) -> list:
+        '''
+        Stores a card in memory, evicting the least recently used cards while
+        it is over its size. A card larger than the whole cache is not kept.
+
+        Parameters
+        ----------
+            key : str
+                The key of the card.
+            card : bytes
+                The encoded card.
+
+        Returns
+        -------
+            list
+                The evicted cards, [(key, card)], to spill them.
+        '''
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        if len(card) > self.max_bytes:
+            return [(key, card)]
+
+        self.entries[key] = card
+        self.size += len(card)
+        evicted = []
+        while self.size > self.max_bytes:
+            old_key, old_card = self.entries.popitem(last=False)
+            self.size -= len(old_card)
+            evicted.append((old_key, old_card))
+        return evicted
+
+
+    def __path__(self, key: str) -> str:
+        '''
+        Returns the path of a spilled card.
+
+        Parameters
+        ----------
+            key : str
+                The key of the card.
+
+        Returns
+        -------
+            str
+                The path of the card in the directory.
+        '''
+        return os.path.join(self.directory, key + CARD_CACHE_EXTENSION)
+
+
+    def spill(self, cards: list) -> NoReturn:
+        '''
+        Writes evicted cards to the directory, removing the oldest ones while
+        it is over its size. It does nothing without a directory.
+
+        Parameters
+        ----------
+            cards : list
+                The evicted cards, [(key, card)].
+        '''
+        if self.directory is None:
+            return
+
+        for key, card in cards:
+            if key in self.spilled or len(card) > self.max_disk_bytes:
+                continue
+            with open(self.__path__(key), 'wb') as fd:
+                fd.write(card)
+            self.spilled[key] = len(card)
+            self.disk_size += len(card)
+
+        while self.disk_size > self.max_disk_bytes:
+            old_key, size = self.spilled.popitem(last=False)
+            self.disk_size -= size
+            os.remove(self.__path__(old_key))
+
+
+    def load(self, key: str) -> bytes:
+        '''
+        Returns a spilled card and removes it from the directory, it should be
+        stored in memory again.
+
+        Parameters
+        ----------
+            key : str
+                The key of the card.
+
+        Returns
+        -------
+            bytes
+                The card, None if it was not spilled.
+        '''
+        size = self.spilled.pop(key, None)
+        if size is None:
+            return None
+
+        path = self.__path__(key)
+        with open(path, 'rb') as fd:
+            card = fd.read()
+        os.remove(path)
+        self.disk_size -= size
+        self.disk_hits += 1
+        return card
+
+
+    def stats(self) -> dict:
+        '''
+        Returns the counters of the cache.
+
+        Returns
+        -------
+            dict
+                {'size': int, 'bytes': int, 'disk_bytes': int, 'hits': int,
+                 'disk_hits': int, 'misses': int}
+        '''
+        return {'size': len(self.entries), 'bytes': self.size, 'disk_bytes': self.disk_size,
+                'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses}
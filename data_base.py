@@ -1,8 +1,7 @@
 import sqlite3
 import time
-import folium
 from typing import NoReturn
-import matplotlib.pyplot as plt
+from weather_report import WeatherReport, WeatherReportBatch
 
 
 class Database:
@@ -14,7 +13,9 @@ class Database:
         __DB_LOCATION : str
             The file path where the database is stored.
         __db_connection : sqlite3.Connection
-            Object that uses to interact with the SQLite database.
+            Object that uses to interact with the SQLite database. It can be used
+            from a thread different to the one that created it, but only from
+            one thread at the same time.
 
     Methods
     -------
@@ -28,10 +29,15 @@ class Database:
             Returns True if the user with the given id exists in the database, False otherwise.
         add_user(user: dict) -> NoReturn:
             Inserts a new user into the database.
-        add_register(data: dict, user_id: int, is_real_location: bool) -> NoReturn:
+        add_user_if_not_exist(user: dict) -> bool:
+            Inserts a new user into the database if it does not exist yet.
+        add_register(report: WeatherReport, user_id: int, is_real_location: bool,
+                     server_time: int) -> NoReturn:
             Inserts a new register into the database.
-        get_registers_from_epoch(epoch: int) -> list:
-            Returns a list of registers since a specific epoch.
+        get_registers_from_epoch(epoch: int) -> WeatherReportBatch:
+            Returns the registers since a specific epoch.
+        get_top_regions(epoch: int, limit: int) -> list:
+            Returns the regions most requested by name since a specific epoch.
         count_users() -> int:
             Returns the number of users in the database.
         draw_locations_in_a_map_and_statistics(epoch: int=0, opath: str='stat/') -> NoReturn:
@@ -45,7 +51,7 @@ class Database:
         '''
         Creates a new database connection and initializes the tables.
         '''
-        self.__db_connection = sqlite3.connect(self.__DB_LOCATION)
+        self.__db_connection = sqlite3.connect(self.__DB_LOCATION, check_same_thread=False)
         self.__create_tabales__()
 
 
@@ -136,15 +142,36 @@ class Database:
         self.__db_connection.commit()
 
 
-    def add_register(self, data: dict, user_id: int, is_real_location: bool, server_time: int) -> NoReturn:
+    def add_user_if_not_exist(self, user: dict) -> bool:
+        '''
+        Adds a new user to the database if it does not exist yet.
+
+        Parameters
+        ----------
+            user: dict
+                A dictionary containing user data.
+
+        Returns
+        -------
+            bool
+                True if the user was added, False if it already existed.
+        '''
+        if self.user_exist(user['id']):
+            return False
+        self.add_user(user)
+        return True
+
+
+    def add_register(self, report: WeatherReport, user_id: int, is_real_location: bool,
+                     server_time: int) -> NoReturn:
 
         '''
         Adds a new register to the database.
 
         Parameters
         ----------
-            data : dict
-                A dictionary containing register data.
+            report : WeatherReport
+                The weather of the register.
             user_id : int
                 The id of the user who made the register.
             is_real_location : bool
@@ -153,28 +180,20 @@ class Database:
                 The time server is running.
         '''
         cursor = self.__db_connection.cursor()
-        query = '''INSERT INTO registers (user_id, localtime, lat, lon, country, region,
+        query = '''INSERT INTO registers (country, localtime, region, lon, lat,
                                           temperature, weather_code, weather_descriptions,
                                           wind_speed, wind_degree, wind_dir,
                                           pressure, precip, humidity, cloudcover,
                                           feelslike, uv_index, visibility, is_day,
-                                          is_real_location, server_time)
+                                          user_id, is_real_location, server_time)
                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
-        cursor.execute(query, (user_id, data['localtime'], data['lat'],
-                               data['lon'], data['country'], data['region'],
-                               data['temperature'], data['weather_code'],
-                               ', '.join(data['weather_descriptions']),
-                               data['wind_speed'], data['wind_degree'], data['wind_dir'],
-                               data['pressure'], data['precip'], data['humidity'],
-                               data['cloudcover'], data['feelslike'], data['uv_index'],
-                               data['visibility'], data['is_day'], is_real_location,
-                               server_time))
+        cursor.execute(query, report.to_row() + (user_id, is_real_location, server_time))
         self.__db_connection.commit()
 
 
-    def get_registers_from_epoch(self, epoch: int) -> list:
+    def get_registers_from_epoch(self, epoch: int) -> WeatherReportBatch:
         '''
-        Returns a list of registers since a specific epoch.
+        Returns the registers since a specific epoch.
 
         Parameters
         ----------
@@ -183,26 +202,44 @@ class Database:
 
         Returns
         -------
-            list
-                A list of dictionaries containing register data.
+            WeatherReportBatch
+                The weather of the registers, with the extra columns
+                'is_real_location', 'username' and 'server_time'.
         '''
         cursor = self.__db_connection.cursor()
-        query = 'SELECT * FROM registers INNER JOIN users ON registers.user_id=users.id WHERE server_time >= ?'
+        query = '''SELECT country, localtime, region, lon, lat, temperature, weather_code,
+                          weather_descriptions, wind_speed, wind_degree, wind_dir, pressure,
+                          precip, humidity, cloudcover, feelslike, uv_index, visibility, is_day,
+                          is_real_location, username, server_time
+                   FROM registers INNER JOIN users ON registers.user_id=users.id
+                   WHERE server_time >= ?'''
         result = cursor.execute(query, (epoch,)).fetchall()
+        return WeatherReportBatch.from_rows(result, ('is_real_location', 'username', 'server_time'))
 
-        registers = []
-        for row in result:
-            register = {'id': row[0], 'user_id': row[1], 'localtime': row[2], 'lat': row[3],
-                        'lon': row[4], 'country': row[5], 'region': row[6],
-                        'temperature': row[7], 'weather_code': row[8],
-                        'weather_descriptions': row[9].split(', '), 'wind_speed': row[10],
-                        'wind_degree': row[11], 'wind_dir': row[12], 'pressure': row[13],
-                        'precip': row[14], 'humidity': row[15], 'cloudcover': row[16],
-                        'feelslike': row[17], 'uv_index': row[18], 'visibility': row[19],
-                        'is_day': row[20], 'is_real_location': row[21], 'username': row[26],
-                        'server_time': row[27]}
-            registers.append(register)
-        return registers
+
+    def get_top_regions(self, epoch: int, limit: int) -> list:
+        '''
+        Returns the regions most requested with /place since a specific epoch.
+
+        Parameters
+        ----------
+            epoch : int
+                The epoch time from which registers are counted.
+            limit : int
+                The maximum number of regions.
+
+        Returns
+        -------
+            list
+                A list of dictionaries {'region': str, 'country': str, 'requests': int},
+                from the most to the least requested.
+        '''
+        cursor = self.__db_connection.cursor()
+        query = '''SELECT region, country, COUNT(*) AS requests FROM registers
+                   WHERE server_time >= ? AND is_real_location
+                   GROUP BY region, country ORDER BY requests DESC LIMIT ?'''
+        result = cursor.execute(query, (epoch, limit)).fetchall()
+        return [{'region': row[0], 'country': row[1], 'requests': row[2]} for row in result]
 
 
     def count_users(self) -> int:
@@ -232,6 +269,11 @@ class Database:
             opath : str
                 The path where to save the output files. If not specified, it defaults to 'stat/'.
         '''
+        # The plotting libraries take most of the startup, they are only
+        # imported when the statistics are drawn.
+        import folium
+        import matplotlib.pyplot as plt
+
         if epoch == 0:
             epoch = int(time.time()) - 86400
         if epoch < 0:
@@ -240,18 +282,21 @@ class Database:
 
         # Create a map with all the registered locations
         map = folium.Map(location=[0, 0], zoom_start=2)
-        for register in registers:
-            popup_text = f"{register['username']}, {register['weather_descriptions'][0]}, {register['temperature']}°C"
-            if register['is_real_location']:
+        for username, descriptions, temperature, is_real_location, lat, lon in zip(
+                registers.column('username'), registers.column('weather_descriptions'),
+                registers.column('temperature'), registers.column('is_real_location'),
+                registers.column('lat'), registers.column('lon')):
+            popup_text = f"{username}, {descriptions[0]}, {temperature}°C"
+            if is_real_location:
                 icon = folium.Icon(color='green')
             else:
                 icon = folium.Icon(color='red')
-            folium.Marker(location=[register['lat'], register['lon']], popup=popup_text, icon=icon).add_to(map)
+            folium.Marker(location=[lat, lon], popup=popup_text, icon=icon).add_to(map)
         map.save(opath + time.strftime("%Y-%m-%d", time.localtime(epoch)) + '_map.html')
 
         # Create some statistics about the data
-        temperatures = [register['temperature'] for register in registers]
-        humidity = [register['humidity'] for register in registers]
+        temperatures = registers.column('temperature')
+        humidity = registers.column('humidity')
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 5))
         ax1.hist(temperatures, bins=20)
         ax1.set_xlabel('Temperature (°C)')
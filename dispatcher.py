@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable, NoReturn
+
+'''
+Constants
+---------
+    The default number of updates handled at the same time, and of updates
+    scheduled, running or waiting for their chat, before dispatch waits.
+'''
+DISPATCHER_DEFAULT_CONCURRENCY = 16
+DISPATCHER_DEFAULT_BACKLOG = 1024
+
+'''
+Constants
+---------
+    The seconds the scheduled updates are awaited when the bot stops.
+'''
+DISPATCHER_DEFAULT_JOIN_TIMEOUT = 10
+
+
+class Dispatcher:
+    '''
+    This class runs the handling of many updates at once as asyncio tasks,
+    keeping the replies to any one chat in the same order that the updates
+    arrived.
+
+    Attributes
+    ----------
+        concurrency : int
+            The maximum number of updates handled at the same time.
+        logger : Logger
+            The logger used to report the errors raised by the handlers.
+        backlog : int
+            The maximum number of scheduled updates, running or waiting.
+        semaphore : asyncio.Semaphore
+            Limits the number of handlers running, the tasks waiting for their
+            chat do not hold it.
+        tails : dict
+            The last task scheduled for each chat, the next task of the same
+            chat waits for it before starting.
+        tasks : set
+            The tasks that have not finished yet.
+
+    Methods
+    -------
+        __init__(logger, concurrency=DISPATCHER_DEFAULT_CONCURRENCY,
+                 backlog=DISPATCHER_DEFAULT_BACKLOG) -> NoReturn:
+            Constructor for the Dispatcher class.
+        dispatch(chat_id, handler) -> NoReturn:
+            Schedules a handler, waiting while the backlog is full.
+        join() -> NoReturn:
+            Waits until every scheduled handler has finished.
+        pending() -> int:
+            Returns the number of handlers that have not finished yet.
+    '''
+
+    def __init__(self, logger: logging.Logger,
+                 concurrency: int = DISPATCHER_DEFAULT_CONCURRENCY,
+                 backlog: int = DISPATCHER_DEFAULT_BACKLOG) -> NoReturn:
+        '''
+        Constructor for the Dispatcher class.
+
+        Parameters
+        ----------
+            logger : logging.Logger
+                Logger object to report the errors raised by the handlers.
+            concurrency : int
+                The maximum number of updates handled at the same time.
+            backlog : int
+                The maximum number of scheduled updates, running or waiting.
+
+        Raises
+        ------
+            AssertionError: if the concurrency or the backlog is lower than one.
+        '''
+        assert concurrency >= 1, 'Concurrency must be at least one.'
+        assert backlog >= 1, 'Backlog must be at least one.'
+
+        self.concurrency = concurrency
+        self.backlog = backlog
+        self.logger = logger
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tails = {}
+        self.tasks = set()
+
+
+    async def dispatch(self, chat_id: Hashable,
+                       handler: Callable[[], Awaitable[None]]) -> NoReturn:
+        '''
+        Schedules a handler as a new task. If the backlog is full it waits
+        until one of the scheduled handlers finishes, so the caller stops
+        reading new updates while the bot is busy.
+
+        Parameters
+        ----------
+            chat_id : Hashable
+                The chat the update belongs to. The handlers of the same chat
+                run one after the other.
+            handler : Callable[[], Awaitable[None]]
+                A function without arguments that returns the coroutine to run.
+        '''
+        while len(self.tasks) >= self.backlog:
+            await asyncio.wait(tuple(self.tasks), return_when=asyncio.FIRST_COMPLETED)
+
+        previous = self.tails.get(chat_id)
+        task = asyncio.create_task(self.__run__(chat_id, previous, handler))
+        self.tails[chat_id] = task
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+    async def __run__(self, chat_id: Hashable, previous: asyncio.Task,
+                      handler: Callable[[], Awaitable[None]]) -> NoReturn:
+        '''
+        Runs a handler after the previous handler of the same chat. It only
+        takes a slot of the concurrency limit once the previous one finished,
+        so a busy chat does not block the others.
+
+        Parameters
+        ----------
+            chat_id : Hashable
+                The chat the update belongs to.
+            previous : asyncio.Task
+                The last task of the same chat, or None.
+            handler : Callable[[], Awaitable[None]]
+                A function without arguments that returns the coroutine to run.
+        '''
+        try:
+            if previous is not None:
+                # The errors of the previous task were already logged by it.
+                await asyncio.wait((previous,))
+            async with self.semaphore:
+                await handler()
+        except Exception:
+            self.logger.exception(f'Error handling an update from chat: {chat_id}.')
+        finally:
+            if self.tails.get(chat_id) is asyncio.current_task():
+                del self.tails[chat_id]
+
+
+    async def join(self) -> NoReturn:
+        '''
+        Waits until every scheduled handler has finished.
+        '''
+        while self.tasks:
+            await asyncio.wait(tuple(self.tasks))
+
+
+    def pending(self) -> int:
+        '''
+        Returns the number of handlers that have not finished yet.
+
+        Returns
+        -------
+            int
+                The number of tasks in flight or waiting for their chat.
+        '''
+        return len(self.tasks)
@@ -0,0 +1,187 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Executor as PoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, NoReturn
+
+'''
+Constants
+---------
+    The default sizes of the pools.
+'''
+EXECUTOR_DEFAULT_IO_WORKERS = 8
+EXECUTOR_DEFAULT_CPU_WORKERS = os.cpu_count() or 1
+
+'''
+Constants
+---------
+    The start method of the worker processes. The native pixie library does not
+    survive a fork of a process that already loaded it, so the workers start
+    from a new interpreter.
+'''
+EXECUTOR_CPU_START_METHOD = 'spawn'
+
+
+def init_cpu_worker(initializer: Callable = None) -> NoReturn:
+    '''
+    Initializes a worker of the process pool. The workers ignore the keyboard
+    interrupts, the main process is the one in charge of stopping them.
+
+    Parameters
+    ----------
+        initializer : Callable
+            A function defined at module level that warms up the worker, or None.
+    '''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer()
+
+
+class Executor:
+    '''
+    This class sends the blocking work out of the event loop, each kind of work
+    runs in the right place.
+
+    Attributes
+    ----------
+        io_pool : ThreadPoolExecutor
+            Threads for blocking I/O, like the HTTP requests.
+        cpu_pool : ProcessPoolExecutor
+            Processes for CPU heavy work, like rendering the images.
+        db_pool : ThreadPoolExecutor
+            A dedicated thread for the database, so the SQLite connection is
+            never used by two threads at the same time.
+
+    Methods
+    -------
+        __init__(io_workers=EXECUTOR_DEFAULT_IO_WORKERS,
+                 cpu_workers=EXECUTOR_DEFAULT_CPU_WORKERS, cpu_initializer=None) -> NoReturn:
+            Constructor for the Executor class.
+        run_io(func, *args, **kwargs) -> Any:
+            Runs a blocking I/O function in the I/O thread pool.
+        run_cpu(func, *args, **kwargs) -> Any:
+            Runs a CPU heavy function in the process pool.
+        run_db(func, *args, **kwargs) -> Any:
+            Runs a database function in the database thread.
+        shutdown(wait: bool = True) -> NoReturn:
+            Stops every pool.
+    '''
+
+    def __init__(self, io_workers: int = EXECUTOR_DEFAULT_IO_WORKERS,
+                 cpu_workers: int = EXECUTOR_DEFAULT_CPU_WORKERS,
+                 cpu_initializer: Callable = None) -> NoReturn:
+        '''
+        Constructor for the Executor class.
+
+        Parameters
+        ----------
+            io_workers : int
+                The number of threads for blocking I/O.
+            cpu_workers : int
+                The number of processes for CPU heavy work.
+            cpu_initializer : Callable
+                A function defined at module level that runs once in every
+                worker process when it starts.
+
+        Raises
+        ------
+            AssertionError: if a pool size is lower than one.
+        '''
+        assert io_workers >= 1, 'The I/O pool needs at least one worker.'
+        assert cpu_workers >= 1, 'The CPU pool needs at least one worker.'
+
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='io')
+        self.cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers, initializer=init_cpu_worker,
+                                            initargs=(cpu_initializer,),
+                                            mp_context=multiprocessing.get_context(EXECUTOR_CPU_START_METHOD))
+        self.db_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+
+
+    async def __run__(self, pool: PoolExecutor, func: Callable, *args, **kwargs) -> Any:
+        '''
+        Runs a function in a pool and waits for its result.
+
+        Parameters
+        ----------
+            pool : concurrent.futures.Executor
+                The pool where the function runs.
+            func : Callable
+                The function to run.
+
+        Returns
+        -------
+            Any
+                The value returned by the function.
+        '''
+        loop = asyncio.get_running_loop()
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        return await loop.run_in_executor(pool, func, *args)
+
+
+    async def run_io(self, func: Callable, *args, **kwargs) -> Any:
+        '''
+        Runs a blocking I/O function in the I/O thread pool.
+
+        Parameters
+        ----------
+            func : Callable
+                The function to run.
+
+        Returns
+        -------
+            Any
+                The value returned by the function.
+        '''
+        return await self.__run__(self.io_pool, func, *args, **kwargs)
+
+
+    async def run_cpu(self, func: Callable, *args, **kwargs) -> Any:
+        '''
+        Runs a CPU heavy function in the process pool. The function and its
+        arguments must be picklable.
+
+        Parameters
+        ----------
+            func : Callable
+                The function to run, defined at module level.
+
+        Returns
+        -------
+            Any
+                The value returned by the function.
+        '''
+        return await self.__run__(self.cpu_pool, func, *args, **kwargs)
+
+
+    async def run_db(self, func: Callable, *args, **kwargs) -> Any:
+        '''
+        Runs a database function in the database thread.
+
+        Parameters
+        ----------
+            func : Callable
+                The function to run.
+
+        Returns
+        -------
+            Any
+                The value returned by the function.
+        '''
+        return await self.__run__(self.db_pool, func, *args, **kwargs)
+
+
+    def shutdown(self, wait: bool = True) -> NoReturn:
+        '''
+        Stops every pool, the work not started yet is cancelled.
+
+        Parameters
+        ----------
+            wait : bool
+                True to wait for the running work to finish.
+        '''
+        for pool in (self.io_pool, self.cpu_pool, self.db_pool):
+            pool.shutdown(wait=wait, cancel_futures=True)
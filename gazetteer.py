@@ -0,0 +1,360 @@
+import csv
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import NoReturn
+
+'''
+Constants
+---------
+    The bundled data files of the Gazetteer class, the cities with more than
+    5000 inhabitants and the countries of GeoNames.
+'''
+GAZETTEER_DEFAULT_LOCATION = 'src/cities.csv'
+GAZETTEER_DEFAULT_COUNTRIES = 'src/countries.csv'
+
+'''
+Constants
+---------
+    The settings of the suggestions: the maximum number of suggestions and the
+    minimum trigram similarity of a suggestion.
+'''
+GAZETTEER_DEFAULT_SUGGESTIONS = 3
+GAZETTEER_MIN_SIMILARITY = 0.4
+
+'''
+Constants
+---------
+    The characters that are not part of a normalized name.
+'''
+GAZETTEER_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+
+class Gazetteer:
+    '''
+    An offline index of the cities of the world, used to validate the /place
+    queries before calling the API. It resolves names and aliases to a single
+    canonical query, like 'Paris, France', and it suggests close matches for
+    the unknown names.
+
+    The names are normalized and kept in a sorted list for exact and prefix
+    lookups with a binary search, the cities of a name and the trigram
+    postings are stored in typed arrays to keep the index compact.
+
+    Attributes
+    ----------
+        names : list
+            The name of every city, by city id.
+        countries : list
+            The country code of every city, by city id.
+        population : array
+            The population of every city, by city id.
+        keys : list
+            The normalized names and aliases, sorted.
+        starts : array
+            The offset in entries of the cities of every key, with a last
+            offset for the end.
+        entries : array
+            The city ids of every key, the cities with that name first and
+            then the ones with that alias, by population.
+        trigrams : dict
+            The ids of the keys that contain every trigram, None until the
+            first suggestion.
+        country_codes : dict
+            The country code of every normalized country name and code.
+        country_names : dict
+            The name of every country code.
+
+    Methods
+    -------
+        __init__(location=GAZETTEER_DEFAULT_LOCATION,
+                 countries=GAZETTEER_DEFAULT_COUNTRIES) -> NoReturn:
+            Loads the data files and builds the index.
+        warm_up() -> NoReturn:
+            Builds the index of the suggestions.
+        normalize(name: str) -> str:
+            Returns the normalized form of a name.
+        lookup(query: str) -> str:
+            Returns the canonical query of a place, None if it is unknown.
+        complete(prefix: str, limit: int = GAZETTEER_DEFAULT_SUGGESTIONS) -> list:
+            Returns the canonical queries of the places that start with a prefix.
+        suggest(query: str, limit: int = GAZETTEER_DEFAULT_SUGGESTIONS) -> list:
+            Returns the canonical queries of the places close to a query.
+    '''
+
+    def __init__(self, location: str = GAZETTEER_DEFAULT_LOCATION,
+                 countries: str = GAZETTEER_DEFAULT_COUNTRIES) -> NoReturn:
+        '''
+        Loads the data files and builds the index.
+
+        Parameters
+        ----------
+            location : str
+                The CSV file of the cities: name, country, population and
+                aliases separated by '|'.
+            countries : str
+                The CSV file of the countries: iso, iso3 and name.
+        '''
+        self.country_codes = {}
+        self.country_names = {}
+        with open(countries, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                self.country_names[row['iso']] = row['name']
+                for name in (row['iso'], row['iso3'], row['name']):
+                    self.country_codes[self.normalize(name)] = row['iso']
+
+        self.names = []
+        self.countries = []
+        self.population = array('I')
+        index = []
+        with open(location, newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader)
+            for name, country, population, aliases in reader:
+                city = len(self.names)
+                population = int(population)
+                self.names.append(name)
+                self.countries.append(country)
+                self.population.append(population)
+                index.append((self.normalize(name), 0, -population, city))
+                for alias in filter(None, aliases.split('|')):
+                    index.append((self.normalize(alias), 1, -population, city))
+
+        index.sort()
+        self.keys = []
+        self.starts = array('I')
+        self.entries = array('I')
+        self.trigrams = None
+        for key, _, _, city in index:
+            if not self.keys or self.keys[-1] != key:
+                self.keys.append(key)
+                self.starts.append(len(self.entries))
+            self.entries.append(city)
+        self.starts.append(len(self.entries))
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+    def warm_up(self) -> NoReturn:
+        '''
+        Builds the index of the suggestions, so the first unknown name does
+        not wait for it.
+        '''
+        self.__index_trigrams__()
+
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        '''
+        Returns the normalized form of a name: without accents, in lower case
+        and with single spaces between words.
+
+        Parameters
+        ----------
+            name : str
+                The name of a place.
+
+        Returns
+        -------
+            str
+                The normalized name.
+        '''
+        if not name.isascii():
+            name = unicodedata.normalize('NFKD', name)
+            name = ''.join(char for char in name if not unicodedata.combining(char))
+        return GAZETTEER_SEPARATORS.sub(' ', name.lower()).strip()
+
+
+    @staticmethod
+    def __trigrams__(key: str) -> set:
+        '''
+        Returns the trigrams of a normalized name, padded with spaces so the
+        start and the end of the name count.
+
+        Parameters
+        ----------
+            key : str
+                The normalized name.
+
+        Returns
+        -------
+            set
+                The trigrams of the name.
+        '''
+        padded = f'  {key} '
+        return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+
+    def __index_trigrams__(self) -> dict:
+        '''
+        Builds the trigram postings the first time they are needed, they are
+        only used for the suggestions of the unknown names.
+
+        Returns
+        -------
+            dict
+                The ids of the keys that contain every trigram.
+        '''
+        if self.trigrams is None:
+            trigrams = {}
+            for key_id, key in enumerate(self.keys):
+                for trigram in self.__trigrams__(key):
+                    trigrams.setdefault(trigram, array('I')).append(key_id)
+            self.trigrams = trigrams
+        return self.trigrams
+
+
+    def __find__(self, key: str, country: str = None) -> int:
+        '''
+        Returns the most populated city of a normalized name or alias.
+
+        Parameters
+        ----------
+            key : str
+                The normalized name.
+            country : str
+                The country code of the city, default any country.
+
+        Returns
+        -------
+            int
+                The city id, None if there is not one.
+        '''
+        position = bisect_left(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key:
+            return None
+
+        for city in self.entries[self.starts[position]:self.starts[position + 1]]:
+            if country is None or self.countries[city] == country:
+                return city
+        return None
+
+
+    def __canonical__(self, city: int) -> str:
+        '''
+        Returns the canonical query of a city.
+
+        Parameters
+        ----------
+            city : int
+                The city id.
+
+        Returns
+        -------
+            str
+                The name of the city and of its country, like 'Paris, France'.
+        '''
+        country = self.country_names.get(self.countries[city], self.countries[city])
+        return f'{self.names[city]}, {country}'
+
+
+    def lookup(self, query: str) -> str:
+        '''
+        Returns the canonical query of a place. The query is a name or an
+        alias of a city, optionally followed by the name or the code of its
+        country, like 'paris', 'nyc' or 'paris us'.
+
+        Parameters
+        ----------
+            query : str
+                The query sent by the user.
+
+        Returns
+        -------
+            str
+                The canonical query, None if the place is unknown.
+        '''
+        key = self.normalize(query)
+        city = self.__find__(key)
+        if city is None:
+            words = key.split()
+            for split in range(len(words) - 1, 0, -1):
+                country = self.country_codes.get(' '.join(words[split:]))
+                if country is not None:
+                    city = self.__find__(' '.join(words[:split]), country)
+                    if city is not None:
+                        break
+
+        if city is None:
+            return None
+        return self.__canonical__(city)
+
+
+    def complete(self, prefix: str, limit: int = GAZETTEER_DEFAULT_SUGGESTIONS) -> list:
+        '''
+        Returns the canonical queries of the most populated places whose name
+        starts with a prefix.
+
+        Parameters
+        ----------
+            prefix : str
+                The start of the name.
+            limit : int
+                The maximum number of places.
+
+        Returns
+        -------
+            list
+                The canonical queries, from the most to the least populated.
+        '''
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return []
+
+        cities = []
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            cities.append(self.entries[self.starts[position]])
+            position += 1
+
+        cities = sorted(set(cities), key=lambda city: -self.population[city])
+        return [self.__canonical__(city) for city in cities[:limit]]
+
+
+    def suggest(self, query: str, limit: int = GAZETTEER_DEFAULT_SUGGESTIONS) -> list:
+        '''
+        Returns the canonical queries of the places close to a query: the
+        places that start with it, and then the names with the most trigrams
+        in common.
+
+        Parameters
+        ----------
+            query : str
+                The query sent by the user.
+            limit : int
+                The maximum number of places.
+
+        Returns
+        -------
+            list
+                The canonical queries, the closest first.
+        '''
+        key = self.normalize(query)
+        trigrams = self.__trigrams__(key)
+        postings = self.__index_trigrams__()
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(postings.get(trigram, ()))
+
+        scored = []
+        for key_id, count in shared.items():
+            # The Jaccard similarity of the trigram sets, a name of n characters
+            # has about n + 2 trigrams.
+            similarity = count / (len(trigrams) + len(self.keys[key_id]) + 2 - count)
+            if similarity >= GAZETTEER_MIN_SIMILARITY:
+                city = self.entries[self.starts[key_id]]
+                scored.append((-similarity, -self.population[city], city))
+        scored.sort()
+
+        suggestions = self.complete(query, limit)
+        for _, _, city in scored:
+            if len(suggestions) >= limit:
+                break
+            canonical = self.__canonical__(city)
+            if canonical not in suggestions:
+                suggestions.append(canonical)
+        return suggestions
@@ -0,0 +1,141 @@
+import time
+from typing import Callable, NoReturn
+from weather_cache import WeatherCache, WEATHER_CACHE_DEFAULT_STALE_TTL
+
+'''
+Constants
+---------
+    The default settings of the GeoCache class. A geohash of 6 characters is a
+    cell of about 1.2 km x 0.6 km.
+'''
+GEO_CACHE_DEFAULT_PRECISION = 6
+GEO_CACHE_DEFAULT_TTL = 600
+GEO_CACHE_DEFAULT_SIZE = 100000
+
+'''
+Constants
+---------
+    The alphabet of the geohash cells.
+'''
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(lat: float, lon: float, precision: int = GEO_CACHE_DEFAULT_PRECISION) -> str:
+    '''
+    Returns the geohash of the cell that contains a coordinate.
+
+    Parameters
+    ----------
+        lat : float
+            The latitude, between -90 and 90.
+        lon : float
+            The longitude, between -180 and 180.
+        precision : int
+            The number of characters of the geohash.
+
+    Returns
+    -------
+        str
+            The geohash of the cell.
+    '''
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    cell = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(cell) < precision:
+        # The bits alternate between longitude and latitude.
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            interval[0] = middle
+        else:
+            value = value << 1
+            interval[1] = middle
+        even = not even
+        bits += 1
+
+        if bits == 5:
+            cell.append(GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+
+    return ''.join(cell)
+
+
+class GeoCache(WeatherCache):
+    '''
+    A cache for the weather of the location messages. The coordinates are
+    mapped to geohash cells, so every lookup inside a cell with a fresh entry
+    reuses the same response. The entries are kept in a hash index, so the
+    lookups stay constant time with hundreds of thousands of cells, and the
+    least recently used cells are evicted when it is full.
+
+    Attributes
+    ----------
+        precision : int
+            The number of characters of the geohash of the cells.
+
+    Methods
+    -------
+        __init__(precision=GEO_CACHE_DEFAULT_PRECISION, ttl=GEO_CACHE_DEFAULT_TTL,
+                 max_size=GEO_CACHE_DEFAULT_SIZE, clock=time.monotonic,
+                 stale_ttl=WEATHER_CACHE_DEFAULT_STALE_TTL) -> NoReturn:
+            Constructor for the GeoCache class.
+        cell_key(lat: float, lon: float, unit: str) -> tuple:
+            Returns the cache key of the cell of a coordinate.
+    '''
+
+    def __init__(self, precision: int = GEO_CACHE_DEFAULT_PRECISION,
+                 ttl: float = GEO_CACHE_DEFAULT_TTL,
+                 max_size: int = GEO_CACHE_DEFAULT_SIZE,
+                 clock: Callable[[], float] = time.monotonic,
+                 stale_ttl: float = WEATHER_CACHE_DEFAULT_STALE_TTL) -> NoReturn:
+        '''
+        Constructor for the GeoCache class.
+
+        Parameters
+        ----------
+            precision : int
+                The number of characters of the geohash of the cells, from 1 to 12.
+            ttl : float
+                Seconds an entry is fresh.
+            max_size : int
+                Maximum number of cells.
+            clock : Callable[[], float]
+                The function that returns the current time in seconds.
+            stale_ttl : float
+                Seconds an expired entry can still be served, 0 disables it.
+
+        Raises
+        ------
+            AssertionError: if the precision is not between 1 and 12.
+        '''
+        assert 1 <= precision <= 12, 'Precision not available.'
+
+        super().__init__(ttl, max_size, clock, stale_ttl)
+        self.precision = precision
+
+
+    def cell_key(self, lat: float, lon: float, unit: str) -> tuple:
+        '''
+        Returns the cache key of the cell that contains a coordinate.
+
+        Parameters
+        ----------
+            lat : float
+                The latitude.
+            lon : float
+                The longitude.
+            unit : str
+                The unit of the API call.
+
+        Returns
+        -------
+            tuple
+                The key of the entry.
+        '''
+        return (geohash(lat, lon, self.precision), unit)
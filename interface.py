@@ -1,31 +1,66 @@
 import pixie
 import warnings
+import tempfile
+import math
 import os
 from typing import NoReturn
 from background import Background
-from wsymbol import WSymbol
+from weather_report import WeatherReport
+from assets import AssetRegistry, ASSETS_DEFAULT_FONT
 
 '''
 Constants
 ---------
     The path of the default font.
 '''
-INTERFACE_DEFAULT_FONT = 'src/Ubuntu-Regular_1.ttf'
+INTERFACE_DEFAULT_FONT = ASSETS_DEFAULT_FONT
 if not os.path.isfile(INTERFACE_DEFAULT_FONT):
     warnings.warn('Default font not found.')
 
 '''
 Constants
 ---------
-    Used to match the weather with the background image.
+    The scale of the icons in the layout, they are scaled once by WSymbol.
 '''
-INTERFACE_SNOW_CODES = [371, 368, 338, 335, 332, 329, 326, 323, 230, 179, 227]
-INTERFACE_THUNDER_CODES = [395, 392, 389, 200, 386]
-INTERFACE_CLOUDY_CODES = [119, 116, 263, 266, 317]
-INTERFACE_RAIN_CODES = [350, 374, 362, 284, 281, 182, 143, 122, 353, 296, 176, 311,
-                        293, 377, 320, 365, 359, 356, 305, 299, 185, 314, 308, 302]
-INTERFACE_CLEAR_CODES = [113]
-INTERFACE_FOG_CODES = [260, 248]
+INTERFACE_ICON_SCALE = 0.4
+INTERFACE_ICON_SCALES = (INTERFACE_ICON_SCALE,)
+
+'''
+Constants
+---------
+    The colors of the text, over the light and the dark backgrounds.
+'''
+INTERFACE_DARK_COLOR = (0, 0, 0, 0.78125)
+INTERFACE_LIGHT_COLOR = (0.78125, 0.78125, 0.78125, 1)
+INTERFACE_COLORS = (INTERFACE_DARK_COLOR, INTERFACE_LIGHT_COLOR)
+
+'''
+Constants
+---------
+    The blocks of the details, (label, value) by line. The labels never
+    change, they are rasterized once by color.
+'''
+INTERFACE_LABEL_SIZE = 20
+INTERFACE_LABEL_PADDING = 2
+INTERFACE_WIND_LABELS = (('Wind speed: ', '{} Km/H '),
+                         ('Wind degree: ', '{}°'),
+                         ('Wind Dir: ', '{} '),
+                         ('Pressure: ', '{} MB'),
+                         ('Precip: ', '{} MM'))
+INTERFACE_AIR_LABELS = (('Humidity: ', '{} kPa'),
+                        ('Cloud cover: ', '{} okta'),
+                        ('Feelslike: ', '{} °C'),
+                        ('UV index: ', '{} '),
+                        ('Visibility: ', '{} Km/H'))
+
+'''
+Constants
+---------
+    pixie can only encode to a file, the images are encoded in a memory backed
+    directory when the host has one.
+'''
+INTERFACE_ENCODE_PATH = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+INTERFACE_DEFAULT_EXTENSION = '.png'
 
 
 class Interface():
@@ -34,24 +69,8 @@ class Interface():
 
     Attributes
     ----------
-        response : dict
-            The response obtained from the API. The format is:
-                response = {'country': str,
-                            'region': str,
-                            'temperature': int,
-                            'weather_code': int,
-                            'weather_descriptions': [str],
-                            'wind_speed': int,
-                            'wind_degree': int,
-                            'wind_dir': str,
-                            'pressure': int,
-                            'precip': int,
-                            'humidity': int,
-                            'cloudcover': int,
-                            'feelslike': int,
-                            'uv_index': int,
-                            'visibility': int,
-                            'is_day': bool}.
+        report : WeatherReport
+            The weather drawn in the image.
         font : pixie.Font
             The font used in the image, default is 'Ubuntu-Regular_1.ttf'.
         background : Background
@@ -66,14 +85,23 @@ class Interface():
             The edited image.
         white_font : bool
             True if the background is black, False otherwise.
+        assets : AssetRegistry
+            The decoded typeface, icons and images, shared between Interface
+            objects, they are never modified.
 
     Methods
     -------
-        __init__(response: dict, font=INTERFACE_DEFAULT_FONT) -> NoReturn:
+        __init__(report: WeatherReport, font=INTERFACE_DEFAULT_FONT, assets=None) -> NoReturn:
             Constructs all the necessary attributes for the Interface object.
 
+        read_image(path: str) -> pixie.Image:
+            Returns an image from the assets.
+
         set_background() -> NoReturn:
-            Sets the background image.
+            Sets the background image, with its blurred panel.
+
+        make_panel(image: pixie.Image, width: int, height: int) -> pixie.Image:
+            Returns a background with the blurred panel of the text drawn.
 
         set_font(font_path: str) -> NoReturn:
             Sets a different font to use in the image.
@@ -81,78 +109,120 @@ class Interface():
         make_font(size: int) -> pixie.Font:
             Edits the font for the different text in the image.
 
+        make_label(text: str, size: int, color: tuple) -> pixie.Image:
+            Returns the rasterized text of a label.
+
+        fill_labels(lines: tuple, values: tuple, h_align, x, y, width) -> NoReturn:
+            Draws a block of labels and their values.
+
         make_image() -> NoReturn:
             Draws the different parts of the final picture.
 
         save_image(path) -> NoReturn:
             Saves the image in the specified path.
+
+        encode_imagen(extension=INTERFACE_DEFAULT_EXTENSION) -> bytes:
+            Returns the encoded image.
     '''
 
 
-    def __init__(self, response: dict, font: str = INTERFACE_DEFAULT_FONT) -> NoReturn:
+    def __init__(self, report: WeatherReport, font: str = INTERFACE_DEFAULT_FONT,
+                 assets: AssetRegistry = None) -> NoReturn:
         '''
         Constructs all the necessary attributes for the Interface object.
 
         Parameters
         ----------
-            response : dict
-                Response obtained from the API, format:
-                    {
-                        'temperature': float,
-                        'region': str,
-                        'country': str,
-                        'is_day': bool,
-                        'weather_code': int,
-                        'weather_descriptions': list[str],
-                        'wind_speed': float,
-                        'wind_degree': int,
-                        'wind_dir': str,
-                        'pressure': float,
-                        'precipitation': float,
-                    }
+            report : WeatherReport
+                The weather drawn in the image.
             font : str
                 The font used in the image, default 'Ubuntu-Regular_1.ttf'.
+            assets : AssetRegistry
+                The shared assets, if it is given the font is not read. Default
+                a new registry that loads the assets of this image.
         '''
-        self.response = response
-        self.font = pixie.read_typeface(font)
+        self.report = report
+        self.assets = assets if assets is not None else AssetRegistry(font)
+        self.font = self.assets.get_typeface()
         self.background = None
-        self.wsymbol = WSymbol()
+        self.wsymbol = self.assets.get_wsymbol()
         self.width = 0
         self.height = 0
         self.image = None
         self.white_font = False
 
 
+    def read_image(self, path: str) -> pixie.Image:
+        '''
+        Returns the image of a path from the assets, it is only decoded the
+        first time. The returned image must not be modified.
+
+        Parameters
+        ----------
+            path : str
+                The path of the image.
+
+        Returns
+        -------
+            pixie.Image
+                The image.
+        '''
+        return self.assets.get_image(path)
+
+
     def set_background(self) -> NoReturn:
         '''
         Set the background image.
         '''
-        if self.response['weather_code'] in INTERFACE_SNOW_CODES:
-            self.background = Background.BACKGROUND_SNOW
-        elif self.response['weather_code'] in INTERFACE_THUNDER_CODES:
-            self.background = Background.BACKGROUND_THUNDER
-        elif self.response['weather_code'] in INTERFACE_CLOUDY_CODES:
-            if self.response['is_day']:
-                self.background = Background.BACKGROUND_CLOUDY_DAY
-            else:
-                self.background = Background.BACKGROUND_CLOUDY_NIGHT
-        elif self.response['weather_code'] in INTERFACE_RAIN_CODES:
-            self.background = Background.BACKGROUND_RAINY
-        elif self.response['weather_code'] in INTERFACE_CLEAR_CODES:
-            if self.response['is_day']:
-                self.background = Background.BACKGROUND_SUNNY_DAY
-            else:
-                self.background = Background.BACKGROUND_SKY_NIGHT
-        elif self.response['weather_code'] in INTERFACE_FOG_CODES:
-            self.background = Background.BACKGROUND_FOG
-        else:
-            message = 'Unknown background, the code: ' + str(self.response['weather_code']) + ' was not found'
+        condition = self.wsymbol.codes.lookup(self.report.weather_code, self.report.is_day)
+        if condition is None or condition.background is Background.BACKGROUND_UNKNOWN:
+            message = 'Unknown background, the code: ' + str(self.report.weather_code) + ' was not found'
             warnings.warn(message)
             self.background = Background.BACKGROUND_UNKNOWN
+        else:
+            self.background = condition.background
 
         self.width, self.height = self.background.get_size()
         (path, self.white_font) = self.background.get_image_path()
-        self.image = pixie.read_image(path)
+        panel = self.assets.get_layer(('panel', path),
+                                      lambda: self.make_panel(self.read_image(path), self.width, self.height))
+        self.image = panel.copy()
+
+
+    @staticmethod
+    def make_panel(image: pixie.Image, width: int, height: int) -> pixie.Image:
+        '''
+        Returns a copy of a background with the blurred rounded panel behind
+        the text drawn. It only depends on the background, so it is built once
+        and shared by every card with that background.
+
+        Parameters
+        ----------
+            image : pixie.Image
+                The background image, it is not modified.
+            width : int
+                The width of the background.
+            height : int
+                The height of the background.
+
+        Returns
+        -------
+            pixie.Image
+                The background with the panel.
+        '''
+        path = pixie.Path()
+        path.rounded_rect(0.05 * width, 0.5 * height, width - (0.1 * width),
+                          height - (0.45 * height), 25, 25, 25, 25)
+
+        mask = pixie.Mask(width, height)
+        mask.fill_path(path)
+
+        panel = image.copy()
+        blur = image.copy()
+        blur.blur(100)
+        blur.mask_draw(mask)
+        panel.draw(blur)
+        return panel
 
 
     def set_font(self, font_path: str) -> NoReturn:
@@ -171,7 +241,8 @@ class Interface():
 
     def make_font(self, size: int) -> pixie.Font:
         '''
-        Constructs a font object with the given size.
+        Constructs a font object with the given size. The fonts of the
+        typeface of the assets are shared, they must not be modified.
 
         Parameters
         ----------
@@ -182,77 +253,126 @@ class Interface():
             Pixie.Font
                 The resulting font object.
         '''
-        if not self.white_font:
-            color = pixie.Color(0, 0, 0, 0.78125)
-        else:
-            color = pixie.Color(0.78125, 0.78125, 0.78125, 1)
+        color = INTERFACE_LIGHT_COLOR if self.white_font else INTERFACE_DARK_COLOR
+        if self.font is self.assets.get_typeface():
+            return self.assets.get_font(size, color)
 
         font = self.font.new_font()
-        font.paint.color = color
+        font.paint.color = pixie.Color(*color)
         font.size = size
         return font
 
 
-    def make_imagen(self) -> NoReturn:
+    def make_label(self, text: str, size: int, color: tuple) -> pixie.Image:
         '''
-        Draw the different parts of the final picture.
+        Returns the rasterized text of a label, with a padding for the glyphs
+        that overhang.
+
+        Parameters
+        ----------
+            text : str
+                The text of the label.
+            size : int
+                The size of the font.
+            color : tuple
+                The color of the font.
+
+        Returns
+        -------
+            pixie.Image
+                The label, its text starts at INTERFACE_LABEL_PADDING.
         '''
-        icon = self.wsymbol.get_symbol_path_from_code(self.response['weather_code'],
-                                                      self.response['is_day'])
-        icon = pixie.read_image(icon)
-        tmpr = self.wsymbol.get_symbol_temp_from_code(self.response['temperature'])
-        tmpr = pixie.read_image(tmpr)
+        font = self.assets.get_font(size, color)
+        bounds = font.layout_bounds(text)
+        label = pixie.Image(math.ceil(bounds.x) + 2 * INTERFACE_LABEL_PADDING, math.ceil(bounds.y))
+        label.fill_text(font, text, transform=pixie.translate(INTERFACE_LABEL_PADDING, 0))
+        return label
 
-        path = pixie.Path()
-        path.rounded_rect(0.05 * self.width, 0.5 * self.height, self.width - (0.1 * self.width),
-                          self.height - (0.45 * self.height), 25, 25, 25, 25)
 
-        mask = pixie.Mask(self.width, self.height)
-        mask.fill_path(path)
+    def fill_labels(self, lines: tuple, values: tuple, h_align: pixie.HorizontalAlignment,
+                    x: float, y: float, width: float) -> NoReturn:
+        '''
+        Draws a block of labels and their values, a line each. The labels are
+        rasterized once and copied to whole pixels, only the values are laid
+        out.
 
-        blur = self.image.copy()
-        blur.blur(100)
-        blur.mask_draw(mask)
-        self.image.draw(blur)
+        Parameters
+        ----------
+            lines : tuple
+                The (label, value format) of every line.
+            values : tuple
+                The value of every line.
+            h_align : pixie.HorizontalAlignment
+                pixie.LEFT_ALIGN or pixie.RIGHT_ALIGN.
+            x : float
+                The left of the block.
+            y : float
+                The top of the block.
+            width : float
+                The width of the block.
+        '''
+        font = self.make_font(INTERFACE_LABEL_SIZE)
+        color = INTERFACE_LIGHT_COLOR if self.white_font else INTERFACE_DARK_COLOR
+        line_height = font.default_line_height()
+
+        for index, ((label, value), text) in enumerate(zip(lines, values)):
+            text = value.format(text)
+            label_width = font.layout_bounds(label).x
+            left = x
+            if h_align == pixie.RIGHT_ALIGN:
+                # pixie aligns the lines without their trailing spaces.
+                left = x + width - label_width - font.layout_bounds(text.rstrip()).x
+            left = round(left)
+            top = round(y + index * line_height)
+
+            image = self.assets.get_layer(('label', label, INTERFACE_LABEL_SIZE, color),
+                                          lambda: self.make_label(label, INTERFACE_LABEL_SIZE, color))
+            self.image.draw(image, pixie.translate(left - INTERFACE_LABEL_PADDING, top))
+            self.image.fill_text(font, text, transform=pixie.translate(left + label_width, top))
 
-        self.image.draw(icon, pixie.translate(0.1 * self.width, 0.07 * self.height) * pixie.scale(0.4, 0.4))
-        self.image.draw(tmpr, pixie.translate(0.5 * self.width, 0.07 * self.height) * pixie.scale(0.4, 0.4))
+
+    def make_imagen(self) -> NoReturn:
+        '''
+        Draw the different parts of the final picture.
+        '''
+        icon = self.wsymbol.get_symbol_path_from_code(self.report.weather_code,
+                                                      self.report.is_day)
+        icon = self.wsymbol.get_scaled_symbol(icon, INTERFACE_ICON_SCALE)
+        tmpr = self.wsymbol.get_symbol_temp_from_code(self.report.temperature)
+        tmpr = self.wsymbol.get_scaled_symbol(tmpr, INTERFACE_ICON_SCALE)
+
+        # The icons are already scaled, a whole pixel translation copies them
+        # without resampling.
+        self.image.draw(icon, pixie.translate(round(0.1 * self.width), round(0.07 * self.height)))
+        self.image.draw(tmpr, pixie.translate(round(0.5 * self.width), round(0.07 * self.height)))
 
         self.image.fill_text(font=self.make_font(70),
-                             text=str(self.response['temperature']) + ' °C',
+                             text=str(self.report.temperature) + ' °C',
                              h_align=pixie.LEFT_ALIGN,
                              bounds=pixie.Vector2(0.2 * self.width, 0.1 * self.height),
                              transform=pixie.translate(0.75 * self.width, 0.15 * self.height))
 
         self.image.fill_text(font=self.make_font(30),
-                             text=self.response['region'] + ', ' + self.response['country'],
+                             text=self.report.region + ', ' + self.report.country,
                              h_align=pixie.CENTER_ALIGN,
                              bounds=pixie.Vector2(1 * self.width, 0.05 * self.height),
                              transform=pixie.translate(0 * self.width, 0.52 * self.height))
 
         self.image.fill_text(font=self.make_font(30),
-                             text=' ,'.join(self.response['weather_descriptions']),
+                             text=' ,'.join(self.report.weather_descriptions),
                              h_align=pixie.CENTER_ALIGN,
                              bounds=pixie.Vector2(1 * self.width, 0.05 * self.height),
                              transform=pixie.translate(0 * self.width, 0.58 * self.height))
 
-        text = 'Wind speed: {} Km/H \nWind degree: {}°\nWind Dir: {} \nPressure: {} MB\nPrecip: {} MM'
-        self.image.fill_text(font=self.make_font(20),
-                             text=text.format(self.response['wind_speed'], self.response['wind_degree'],
-                                              self.response['wind_dir'], self.response['pressure'],
-                                              self.response['precip']),
-                             h_align=pixie.LEFT_ALIGN,
-                             bounds=pixie.Vector2(0.3 * self.width, 0.2 * self.height),
-                             transform=pixie.translate(0.10 * self.width, 0.72 * self.height))
+        self.fill_labels(INTERFACE_WIND_LABELS,
+                         (self.report.wind_speed, self.report.wind_degree, self.report.wind_dir,
+                          self.report.pressure, self.report.precip),
+                         pixie.LEFT_ALIGN, 0.10 * self.width, 0.72 * self.height, 0.3 * self.width)
 
-        text = 'Humidity: {} kPa\nCloud cover: {} okta\nFeelslike: {} °C\nUV index: {} \nVisibility: {} Km/H\n'
-        self.image.fill_text(font=self.make_font(20),
-                             text=text.format(self.response['humidity'], self.response['cloudcover'],
-                                              self.response['feelslike'], self.response['uv_index'],
-                                              self.response['visibility']),
-                             h_align=pixie.RIGHT_ALIGN,
-                             bounds=pixie.Vector2(0.35 * self.width, 0.2 * self.height),
-                             transform=pixie.translate(0.55 * self.width, 0.72 * self.height))
+        self.fill_labels(INTERFACE_AIR_LABELS,
+                         (self.report.humidity, self.report.cloudcover, self.report.feelslike,
+                          self.report.uv_index, self.report.visibility),
+                         pixie.RIGHT_ALIGN, 0.55 * self.width, 0.72 * self.height, 0.35 * self.width)
 
 
     def save_imagen(self, path: str) -> NoReturn:
@@ -265,3 +385,90 @@ class Interface():
                 The path where the image is saved.
         '''
         self.image.write_file(path)
+
+
+    def encode_imagen(self, extension: str = INTERFACE_DEFAULT_EXTENSION) -> bytes:
+        '''
+        Returns the encoded image. It is written to a file in memory that is
+        removed as soon as it is read, so no file is left behind.
+
+        Parameters
+        ----------
+            extension : str
+                The extension of the format, default '.png'.
+
+        Returns
+        -------
+            bytes
+                The encoded image.
+        '''
+        fd, path = tempfile.mkstemp(suffix=extension, dir=INTERFACE_ENCODE_PATH)
+        try:
+            os.close(fd)
+            self.image.write_file(path)
+            with open(path, 'rb') as file:
+                return file.read()
+        finally:
+            os.unlink(path)
+
+
+def warm_up_panels(assets: AssetRegistry) -> NoReturn:
+    '''
+    Builds the panel layer of every background in the assets, so the
+    first card of each background does not blur it.
+
+    Parameters
+    ----------
+        assets : AssetRegistry
+            The assets where the layers are stored.
+    '''
+    for background in Background:
+        width, height = background.get_size()
+        path = background.get_image_path()[0]
+        assets.get_layer(('panel', path),
+                         lambda: Interface.make_panel(assets.get_image(path), width, height))
+
+
+def warm_up_icons(assets: AssetRegistry) -> NoReturn:
+    '''
+    Scales every icon to the sizes of the layout, so the first card of each
+    icon does not scale it.
+
+    Parameters
+    ----------
+        assets : AssetRegistry
+            The assets whose icons are scaled.
+    '''
+    assets.get_wsymbol().preload(INTERFACE_ICON_SCALES)
+
+
+def warm_up_labels(assets: AssetRegistry) -> NoReturn:
+    '''
+    Rasterizes every label in every color, so the first cards do not lay
+    them out.
+
+    Parameters
+    ----------
+        assets : AssetRegistry
+            The assets where the labels are stored.
+    '''
+    interface = Interface(None, assets=assets)
+    for color in INTERFACE_COLORS:
+        for label, _ in INTERFACE_WIND_LABELS + INTERFACE_AIR_LABELS:
+            assets.get_layer(('label', label, INTERFACE_LABEL_SIZE, color),
+                             lambda: interface.make_label(label, INTERFACE_LABEL_SIZE, color))
+
+
+def warm_up_layout(assets: AssetRegistry) -> NoReturn:
+    '''
+    Builds everything the layout derives from the assets: the panels, the
+    scaled icons and the labels.
+
+    Parameters
+    ----------
+        assets : AssetRegistry
+            The assets where they are stored.
+    '''
+    warm_up_panels(assets)
+    warm_up_icons(assets)
+    warm_up_labels(assets)
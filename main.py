@@ -1,15 +1,42 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import sys
+from startup_profile import StartupProfile
+
+# The imports are timed before the arguments are parsed.
+PROFILE = StartupProfile() if '--profile-startup' in sys.argv else None
+if PROFILE is not None:
+    PROFILE.install()
+
 import logging
 import asyncio
+import contextlib
 import time
 import os
-import sys
-from typing import NoReturn
-from interface import Interface
-from weather_api import WeatherApi
+from typing import Any, Awaitable, Callable, ContextManager, NoReturn
+from weather_api import AsyncWeatherApi, WEATHER_API_DEFAULT_TIMEOUT, WEATHER_API_BULK_MAX
+from weather_cache import WeatherCache, WEATHER_CACHE_DEFAULT_TTL, WEATHER_CACHE_DEFAULT_SIZE, \
+                          WEATHER_CACHE_DEFAULT_STALE_TTL
+from geo_cache import GeoCache, GEO_CACHE_DEFAULT_PRECISION, GEO_CACHE_DEFAULT_SIZE
+from single_flight import SingleFlight
+from persistent_cache import PersistentCache, PERSISTENT_CACHE_DEFAULT_LOCATION
+from resilience import Resilience, CircuitBreaker, RESILIENCE_DEFAULT_RETRIES, RESILIENCE_DEFAULT_DEADLINE, \
+                       CIRCUIT_BREAKER_DEFAULT_THRESHOLD, CIRCUIT_BREAKER_DEFAULT_RESET_TIMEOUT
+from weatherstack_api_error import WeatherStackAPIError
+from weather_unavailable_error import WeatherUnavailableError
 from data_base import Database
-from telegram_bot import TelegramBot, MessageType
+from telegram_bot import TelegramBot, MessageType, TELEGRAM_BOT_FILE_ID_CACHE_SIZE
+from dispatcher import Dispatcher, DISPATCHER_DEFAULT_CONCURRENCY, DISPATCHER_DEFAULT_JOIN_TIMEOUT
+from executor import Executor, EXECUTOR_DEFAULT_IO_WORKERS, EXECUTOR_DEFAULT_CPU_WORKERS
+from render_service import RenderService, init_worker
+from card_cache import CardCache, CARD_CACHE_DEFAULT_SIZE, CARD_CACHE_DEFAULT_DISK_SIZE
+from encoder import Encoder, ENCODER_FORMATS, ENCODER_DEFAULT_FORMAT, ENCODER_DEFAULT_QUALITY, \
+                    ENCODER_DEFAULT_SCALE, ENCODER_DEFAULT_COLORS
+from gazetteer import Gazetteer
+from prefetcher import Prefetcher, PREFETCHER_DEFAULT_TOP, PREFETCHER_DEFAULT_WINDOW, PREFETCHER_DEFAULT_BUDGET, \
+                       PREFETCHER_DEFAULT_BULK
+from webhook import WebhookServer, WEBHOOK_DEFAULT_HOST, WEBHOOK_DEFAULT_PORT, WEBHOOK_DEFAULT_PATH
+from telegram import Update
 import argparse
 import signal
 
@@ -25,6 +52,42 @@ Options:
 -------
     --nodatabase: Disable database tracking
     --showstat: Show statistics at the end of the program.
+    --workers N: Maximum number of updates handled at the same time.
+    --io-workers N: Number of threads for blocking I/O.
+    --cpu-workers N: Number of processes for rendering the images.
+    --card-format FORMAT: Format of the cards: png, jpeg, webp or palette.
+    --card-quality N: Quality of the jpeg and webp cards, from 1 to 100.
+    --card-scale SCALE: Scale of the cards, up to 1.
+    --card-colors N: Number of colors of the palette cards.
+    --card-cache-size BYTES: Maximum bytes of rendered cards kept in memory, 0 disables the cache.
+    --card-cache-dir PATH: Directory where the cards evicted from memory are kept.
+    --card-cache-disk-size BYTES: Maximum bytes of rendered cards kept in the directory.
+    --file-id-cache-size N: Telegram file ids of uploaded cards reused, 0 uploads every card.
+    --http2: Call weatherstack over https with HTTP/2.
+    --weather-timeout SECONDS: Seconds to wait for the response of weatherstack.
+    --weather-retries N: Retries of a weatherstack call after a transient error.
+    --weather-deadline SECONDS: Maximum seconds of a weatherstack call, with all its retries.
+    --breaker-threshold N: Consecutive failed calls that stop calling weatherstack.
+    --breaker-reset SECONDS: Seconds without calling weatherstack after it failed.
+    --cache-ttl SECONDS: Seconds a weather response is reused.
+    --stale-ttl SECONDS: Seconds an expired weather response is served while it is refreshed.
+    --cache-size N: Maximum number of weather responses kept in memory.
+    --geo-precision N: Geohash characters of the cells that share a location response.
+    --geo-cache-size N: Maximum number of location cells kept in memory.
+    --cache-file PATH: SQLite file where the weather responses survive restarts.
+    --nocachefile: Disable the weather cache file.
+    --nogazetteer: Disable the offline check of the /place cities.
+    --prefetch-top N: Most requested places kept in the cache, 0 disables the prefetch.
+    --prefetch-window SECONDS: Seconds of registers counted for the most requested places.
+    --prefetch-budget N: Maximum number of prefetch requests to weatherstack per hour.
+    --prefetch-bulk N: Places of a prefetch request, up to 10 on the plans with bulk queries.
+    --webhook: Receive the updates from a webhook instead of polling Telegram.
+    --host HOST: Address where the webhook server listens.
+    --port PORT: Port where the webhook server listens.
+    --webhook-path PATH: URL path where the webhook server accepts the updates.
+    --webhook-url URL: Public URL registered in Telegram as the webhook.
+    --webhook-insecure: Accept webhook updates without TELEGRAM_WEBHOOK_SECRET, anyone can post them.
+    --profile-startup: Report the time of every import and startup phase, and exit once the bot is ready.
 
 Functions:
 ---------
@@ -32,15 +95,23 @@ Functions:
         Handle keyboard interrupts by raising a KeyboardInterrupt.
     parser() -> NoReturn:
         Parses command-line arguments.
-    main(db: Database, track: bool) -> NoReturn:
+    phase(name: str) -> ContextManager:
+        Times a phase of the startup when it is profiled.
+    handle_update(bot, wapi, db, executor, render_service, gazetteer, track, message, update) -> NoReturn:
+        Replies to a single update according to its type.
+    main(db: Database, args: argparse.Namespace) -> NoReturn:
         The main function that runs the Telegram bot.
-        It receives the Database instance and a boolean flag to indicate whether to track messages in the database.
-        It starts an infinite loop to listen for incoming messages and handle them accordingly.
+        It receives the Database instance and the command-line arguments.
+        It listens for incoming messages, by polling or from the webhook, and dispatches each one as a new task,
+        the replies to the same chat keep the order of the messages.
+
+Environment:
+-----------
+    TELEGRAM_WEBHOOK_SECRET: Secret token checked in every webhook request, required by --webhook
+                             unless --webhook-insecure is given.
 '''
 
 
-EXTENSION = '.png'
-TEMP_FILE = '.tmp/'
 ERROR_CODE_CITY_NOT_FOUND = 615
 
 
@@ -58,91 +129,351 @@ def parser() -> argparse.Namespace:
     parser.add_argument('--showstat', action='store_true',
                         help='Show statistics at the end of the program.')
 
+    parser.add_argument('--workers', type=int, default=DISPATCHER_DEFAULT_CONCURRENCY,
+                        help='Maximum number of updates handled at the same time.')
+
+    parser.add_argument('--io-workers', type=int, default=EXECUTOR_DEFAULT_IO_WORKERS,
+                        help='Number of threads for blocking I/O.')
+
+    parser.add_argument('--cpu-workers', type=int, default=EXECUTOR_DEFAULT_CPU_WORKERS,
+                        help='Number of processes for rendering the images.')
+
+    parser.add_argument('--card-format', choices=ENCODER_FORMATS, default=ENCODER_DEFAULT_FORMAT,
+                        help='Format of the cards: png, jpeg, webp or palette.')
+
+    parser.add_argument('--card-quality', type=int, default=ENCODER_DEFAULT_QUALITY,
+                        help='Quality of the jpeg and webp cards, from 1 to 100.')
+
+    parser.add_argument('--card-scale', type=float, default=ENCODER_DEFAULT_SCALE,
+                        help='Scale of the cards, up to 1.')
+
+    parser.add_argument('--card-colors', type=int, default=ENCODER_DEFAULT_COLORS,
+                        help='Number of colors of the palette cards.')
+
+    parser.add_argument('--card-cache-size', type=int, default=CARD_CACHE_DEFAULT_SIZE,
+                        help='Maximum bytes of rendered cards kept in memory, 0 disables the cache.')
+
+    parser.add_argument('--card-cache-dir', default=None,
+                        help='Directory where the cards evicted from memory are kept.')
+
+    parser.add_argument('--card-cache-disk-size', type=int, default=CARD_CACHE_DEFAULT_DISK_SIZE,
+                        help='Maximum bytes of rendered cards kept in the directory.')
+
+    parser.add_argument('--file-id-cache-size', type=int, default=TELEGRAM_BOT_FILE_ID_CACHE_SIZE,
+                        help='Telegram file ids of uploaded cards reused, 0 uploads every card.')
+
+    parser.add_argument('--http2', action='store_true',
+                        help='Call weatherstack over https with HTTP/2.')
+
+    parser.add_argument('--weather-timeout', type=float, default=WEATHER_API_DEFAULT_TIMEOUT,
+                        help='Seconds to wait for the response of weatherstack.')
+
+    parser.add_argument('--weather-retries', type=int, default=RESILIENCE_DEFAULT_RETRIES,
+                        help='Retries of a weatherstack call after a transient error.')
+
+    parser.add_argument('--weather-deadline', type=float, default=RESILIENCE_DEFAULT_DEADLINE,
+                        help='Maximum seconds of a weatherstack call, with all its retries.')
+
+    parser.add_argument('--breaker-threshold', type=int, default=CIRCUIT_BREAKER_DEFAULT_THRESHOLD,
+                        help='Consecutive failed calls that stop calling weatherstack.')
+
+    parser.add_argument('--breaker-reset', type=float, default=CIRCUIT_BREAKER_DEFAULT_RESET_TIMEOUT,
+                        help='Seconds without calling weatherstack after it failed.')
+
+    parser.add_argument('--cache-ttl', type=float, default=WEATHER_CACHE_DEFAULT_TTL,
+                        help='Seconds a weather response is reused.')
+
+    parser.add_argument('--stale-ttl', type=float, default=WEATHER_CACHE_DEFAULT_STALE_TTL,
+                        help='Seconds an expired weather response is served while it is refreshed.')
+
+    parser.add_argument('--cache-size', type=int, default=WEATHER_CACHE_DEFAULT_SIZE,
+                        help='Maximum number of weather responses kept in memory.')
+
+    parser.add_argument('--geo-precision', type=int, default=GEO_CACHE_DEFAULT_PRECISION,
+                        help='Geohash characters of the cells that share a location response.')
+
+    parser.add_argument('--geo-cache-size', type=int, default=GEO_CACHE_DEFAULT_SIZE,
+                        help='Maximum number of location cells kept in memory.')
+
+    parser.add_argument('--cache-file', default=PERSISTENT_CACHE_DEFAULT_LOCATION,
+                        help='SQLite file where the weather responses survive restarts.')
+
+    parser.add_argument('--nocachefile', action='store_true',
+                        help='Disable the weather cache file.')
+
+    parser.add_argument('--nogazetteer', action='store_true',
+                        help='Disable the offline check of the /place cities.')
+
+    parser.add_argument('--prefetch-top', type=int, default=PREFETCHER_DEFAULT_TOP,
+                        help='Most requested places kept in the cache, 0 disables the prefetch.')
+
+    parser.add_argument('--prefetch-window', type=float, default=PREFETCHER_DEFAULT_WINDOW,
+                        help='Seconds of registers counted for the most requested places.')
+
+    parser.add_argument('--prefetch-budget', type=float, default=PREFETCHER_DEFAULT_BUDGET,
+                        help='Maximum number of prefetch requests to weatherstack per hour.')
+
+    parser.add_argument('--prefetch-bulk', type=int, default=PREFETCHER_DEFAULT_BULK,
+                        help=f'Places of a prefetch request, up to {WEATHER_API_BULK_MAX} on the plans with bulk queries.')
+
+    parser.add_argument('--webhook', action='store_true',
+                        help='Receive the updates from a webhook instead of polling Telegram.')
+
+    parser.add_argument('--host', default=WEBHOOK_DEFAULT_HOST,
+                        help='Address where the webhook server listens.')
+
+    parser.add_argument('--port', type=int, default=WEBHOOK_DEFAULT_PORT,
+                        help='Port where the webhook server listens.')
+
+    parser.add_argument('--webhook-path', default=WEBHOOK_DEFAULT_PATH,
+                        help='URL path where the webhook server accepts the updates.')
+
+    parser.add_argument('--webhook-url', default=None,
+                        help='Public URL registered in Telegram as the webhook.')
+
+    parser.add_argument('--webhook-insecure', action='store_true',
+                        help='Accept webhook updates without TELEGRAM_WEBHOOK_SECRET, anyone can post them.')
+
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Report the time of every import and startup phase, and exit once the bot is ready.')
+
     args = parser.parse_args()
+    if args.webhook and not os.environ.get('TELEGRAM_WEBHOOK_SECRET') and not args.webhook_insecure:
+        parser.error('--webhook needs the TELEGRAM_WEBHOOK_SECRET environment variable, '
+                     'or --webhook-insecure to accept the updates of anyone.')
     return args
 
 
-async def main(db: Database, track: bool) -> NoReturn:
+def phase(name: str) -> ContextManager:
+    '''
+    Times a phase of the startup when it is profiled.
+
+    Parameters
+    ----------
+        name : str
+            The name of the phase.
+
+    Returns
+    -------
+        ContextManager
+            The context that times the phase, it does nothing without
+            --profile-startup.
+    '''
+    if PROFILE is None:
+        return contextlib.nullcontext()
+    return PROFILE.phase(name)
+
+
+async def handle_update(bot: TelegramBot, wapi: AsyncWeatherApi, db: Database, executor: Executor,
+                        render_service: RenderService, gazetteer: Gazetteer, track: bool,
+                        message: MessageType, update: Update) -> NoReturn:
+    '''
+    Replies to a single update according to its type.
+
+    Parameters
+    ----------
+        bot : TelegramBot
+            The bot used to reply.
+        wapi : AsyncWeatherApi
+            The API used to fetch the weather.
+        db : Database
+            The database where the messages are tracked.
+        executor : Executor
+            Runs the blocking work out of the event loop.
+        render_service : RenderService
+            Renders the weather cards in the worker processes.
+        gazetteer : Gazetteer
+            Checks the /place cities and turns them into canonical queries, or None.
+        track : bool
+            True if the messages are tracked in the database.
+        message : MessageType
+            The type of the update.
+        update : Update
+            The update sent by the user.
+    '''
+    is_real_location = False
+
+    if message is MessageType.MENSAGGE_TYPE_HELP:
+        await bot.send_help(update)
+        return
+    elif message is MessageType.MENSAGGE_TYPE_START:
+        await bot.send_start(update)
+        return
+    elif message is MessageType.MENSAGGE_TYPE_NO_SUPPORT:
+        bot.ignore_current_message(update)
+        return
+
+    if message is MessageType.MENSAGGE_TYPE_LOCATION:
+        lat = update.message.location.latitude
+        lon = update.message.location.longitude
+    if message is MessageType.MENSAGGE_TYPE_PLACE:
+        is_real_location = True
+        try:
+            query = update.message.text.split('/place ')[1]
+        except IndexError as e:
+            await bot.send_message('City dont found, please try again.', update)
+            return
+
+        true_location = wapi.check_query(query)
+        if not true_location:
+            await bot.send_message('Error city dont found.', update)
+            return
+
+        if gazetteer is not None:
+            place = gazetteer.lookup(query)
+            if place is None:
+                suggestions = gazetteer.suggest(query)
+                if suggestions:
+                    await bot.send_message('City dont found, did you mean ' + ' or '.join(suggestions) + '?',
+                                           update)
+                else:
+                    await bot.send_message('City dont found, please try again.', update)
+                return
+            query = place
+
+    if track:
+        user = bot.get_current_usser(update)
+        await executor.run_db(db.add_user_if_not_exist, user)
+
+    try:
+        if message is MessageType.MENSAGGE_TYPE_LOCATION:
+            weather = await wapi.get_weather_at(lat, lon)
+        else:
+            weather = await wapi.get_weather(query)
+    except WeatherStackAPIError as error:
+        if error.code == ERROR_CODE_CITY_NOT_FOUND:
+            await bot.send_message('City dont found, please try again.', update)
+            return
+        else:
+            await bot.send_message('Sorry, we are currently unable to process your request.\
+                                    We apologize for any inconvenience this may have caused.', update)
+        raise error
+    except WeatherUnavailableError:
+        await bot.send_message('Sorry, we are currently unable to process your request.\
+                                We apologize for any inconvenience this may have caused.', update)
+        return
+
+    if track:
+        await executor.run_db(db.add_register, weather, user['id'], is_real_location, time.time())
+
+    # A card already uploaded is sent by its file_id, without rendering it.
+    key = render_service.key(weather)
+    if await bot.send_cached_weather(key, update):
+        return
+    image = await render_service.render(weather)
+    await bot.send_weather(image, update, key)
+
+
+async def main(db: Database, args: argparse.Namespace) -> NoReturn:
     logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                         level=logging.INFO)
     logger = logging.getLogger('Telegram Bot')
 
-    wapi = WeatherApi()
-    bot = TelegramBot(logger)
-    count = 0
+    track = not args.nodatabase
+    executor = Executor(args.io_workers, args.cpu_workers, cpu_initializer=init_worker)
+    cache = WeatherCache(args.cache_ttl, args.cache_size, stale_ttl=args.stale_ttl)
+    geo_cache = GeoCache(args.geo_precision, args.cache_ttl, args.geo_cache_size,
+                         stale_ttl=args.stale_ttl)
+    flight = SingleFlight()
+    store = None if args.nocachefile else PersistentCache(args.cache_file, args.cache_ttl)
+    breaker = CircuitBreaker(args.breaker_threshold, args.breaker_reset)
+    resilience = Resilience(args.weather_retries, deadline=args.weather_deadline, breaker=breaker)
+    wapi = AsyncWeatherApi(http=not args.http2, http2=args.http2, timeout=args.weather_timeout,
+                           cache=cache, geo_cache=geo_cache, flight=flight, store=store,
+                           executor=executor, resilience=resilience)
+    bot = TelegramBot(logger, args.file_id_cache_size)
+    dispatcher = Dispatcher(logger, args.workers)
+    card_cache = None
+    if args.card_cache_size > 0:
+        card_cache = CardCache(args.card_cache_size, args.card_cache_dir, args.card_cache_disk_size)
+    encoder = Encoder(args.card_format, args.card_quality, args.card_scale, args.card_colors)
+    render_service = RenderService(executor, args.cpu_workers, card_cache, encoder)
+    gazetteer = None
+    prefetcher = None
+    prefetch_task = None
 
-    while True:
-        message = await bot.wait_menssage()
-        is_real_location = False
+    async def dispatch(message: MessageType, update: Update) -> NoReturn:
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        await dispatcher.dispatch(chat_id, lambda: handle_update(
+            bot, wapi, db, executor, render_service, gazetteer, track, message, update))
 
-        if message is MessageType.MENSAGGE_TYPE_HELP:
-            await bot.send_help()
-        elif message is MessageType.MENSAGGE_TYPE_START:
-            await bot.send_start()
-        elif message is MessageType.MENSAGGE_TYPE_NO_SUPPORT:
-            bot.ignore_current_message()
+    async def warm_up(name: str, func: Callable[[], Awaitable[Any]]) -> NoReturn:
+        with phase(name):
+            await func()
+
+    async def load_gazetteer() -> NoReturn:
+        nonlocal gazetteer
+        with phase('gazetteer'):
+            gazetteer = await executor.run_io(Gazetteer)
+        await warm_up('gazetteer suggestions', lambda: executor.run_io(gazetteer.warm_up))
+
+    try:
+        # The render workers warm up while the gazetteer is loaded in a thread.
+        warm_ups = [warm_up('render workers', render_service.warm_up)]
+        if not args.nogazetteer:
+            warm_ups.append(load_gazetteer())
+        await asyncio.gather(*warm_ups)
+        if track and args.prefetch_top > 0:
+            prefetcher = Prefetcher(wapi, db, executor, logger, gazetteer, args.prefetch_top,
+                                    args.prefetch_window, budget=args.prefetch_budget,
+                                    bulk_size=args.prefetch_bulk)
+        if hasattr(signal, 'SIGHUP'):
+            # kill -HUP reloads the fonts, backgrounds and icons of the cards.
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, render_service.reload)
+        if PROFILE is not None:
+            PROFILE.uninstall()
+            logger.info('Startup profile:\n' + PROFILE.report())
+            return
+        if prefetcher is not None:
+            prefetch_task = asyncio.create_task(prefetcher.run())
+        if args.webhook:
+            secret = os.environ.get('TELEGRAM_WEBHOOK_SECRET') or None
+            if secret is None:
+                logger.warning('The webhook accepts updates without a secret token.')
+            server = WebhookServer(bot, dispatch, secret, args.host, args.port, args.webhook_path)
+            if args.webhook_url:
+                await bot.set_webhook(args.webhook_url, secret)
+            await server.serve_forever()
         else:
-            if message is MessageType.MENSAGGE_TYPE_LOCATION:
-                lat = str(bot.current_update.message.location.latitude)
-                lon = str(bot.current_update.message.location.longitude)
-                query = lat + ',' + lon
-            if message is MessageType.MENSAGGE_TYPE_PLACE:
-                is_real_location = True
-                try:
-                    query = bot.current_update.message.text.split('/place ')[1]
-                except IndexError as e:
-                    await bot.send_message('City dont found, please try again.')
-                    continue
-
-                true_location = wapi.check_query(query)
-                if not true_location:
-                    await bot.send_message('Error city dont found.')
-                    continue
-            try:
-                pass
-            except WeatherStackAPIError as error:
-                if error.code == ERROR_CODE_CITY_NOT_FOUND:
-                    await bot.send_message('City dont found, please try again.')
-                    continue
-                else:
-                    await bot.send_message('Sorry, we are currently unable to process your request.\
-                                            We apologize for any inconvenience this may have caused.')
-                raise error
-
-            if track:
-                user = bot.get_current_usser()
-                if not db.user_exist(user['id']):
-                    db.add_user(user)
-
-            weather = wapi.get_weather(query)
-            weather = wapi.parser_request()
-            if track:
-                db.add_register(weather, user['id'], is_real_location, time.time())
-
-            interface = Interface(weather)
-            interface.set_background()
-            interface.make_imagen()
-            interface.save_imagen(TEMP_FILE + str(count) + EXTENSION)
-            await bot.send_weather(TEMP_FILE + str(count) + EXTENSION)
-            wapi.clean_request()
-            interface = None
-            count += 1
+            # Telegram does not return the updates while a webhook is set.
+            await bot.delete_webhook()
+            async for message, update in bot.iter_updates():
+                await dispatch(message, update)
+    finally:
+        if prefetch_task is not None:
+            prefetch_task.cancel()
+        # The updates in flight finish before their renders and queries are cancelled.
+        try:
+            await asyncio.wait_for(dispatcher.join(), DISPATCHER_DEFAULT_JOIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f'{dispatcher.pending()} updates were still running at shutdown.')
+        executor.shutdown()
+        await wapi.close()
+        if store is not None:
+            store.close()
+        logger.info(f'Weather cache: {cache.stats()}')
+        logger.info(f'Location cache: {geo_cache.stats()}')
+        logger.info(f'Weather calls: {flight.stats()}')
+        logger.info(f'Weather upstream: {resilience.stats()}')
+        logger.info(f'Cards: {render_service.stats()}')
+        if card_cache is not None:
+            logger.info(f'Card cache: {card_cache.stats()}')
+        logger.info(f'Card uploads: {bot.stats()}')
+        if prefetcher is not None:
+            logger.info(f'Prefetch: {prefetcher.stats()}')
 
 
 if __name__ == '__main__':
     args = parser()
-    db = Database()
+    with phase('database'):
+        db = Database()
     signal.signal(signal.SIGINT, signal_handler)
 
     start_time = int(time.time())
 
-    if not os.path.exists(TEMP_FILE):
-        os.makedirs(TEMP_FILE)
     try:
-        asyncio.run(main(db, not args.nodatabase))
+        asyncio.run(main(db, args))
     except KeyboardInterrupt:
-        if os.path.exists(TEMP_FILE):
-            os.system('rm -r ' + TEMP_FILE)
         if args.showstat and not args.nodatabase:
             print('\n*********************************************************')
             db.draw_locations_in_a_map_and_statistics(start_time)
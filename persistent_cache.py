@@ -0,0 +1,175 @@
+import json
+import sqlite3
+import time
+from typing import NoReturn
+
+'''
+Constants
+---------
+    The default settings of the PersistentCache class.
+'''
+PERSISTENT_CACHE_DEFAULT_LOCATION = 'weather_cache.db'
+PERSISTENT_CACHE_DEFAULT_TTL = 600
+PERSISTENT_CACHE_BUSY_TIMEOUT = 5000
+
+
+class PersistentCache:
+    '''
+    A weather cache stored in its own SQLite file in WAL mode, so it survives
+    restarts and it is shared by every process of the host. It stores the raw
+    JSON responses with the time they were fetched.
+
+    Attributes
+    ----------
+        location : str
+            The file path where the cache is stored.
+        ttl : float
+            Seconds an entry is fresh.
+        connection : sqlite3.Connection
+            The connection to the file, None until the first use.
+
+    Methods
+    -------
+        __init__(location=PERSISTENT_CACHE_DEFAULT_LOCATION,
+                 ttl=PERSISTENT_CACHE_DEFAULT_TTL) -> NoReturn:
+            Constructor for the PersistentCache class.
+        key(key: tuple) -> str:
+            Returns the key of an entry in the file.
+        get(key: str) -> (dict, float):
+            Returns the fresh response of a key and the time it was fetched.
+        set(key: str, response: dict, fetched_at: float = None) -> NoReturn:
+            Stores a response.
+        purge() -> int:
+            Removes the expired entries.
+        close() -> NoReturn:
+            Closes the connection.
+    '''
+
+    def __init__(self, location: str = PERSISTENT_CACHE_DEFAULT_LOCATION,
+                 ttl: float = PERSISTENT_CACHE_DEFAULT_TTL) -> NoReturn:
+        '''
+        Constructor for the PersistentCache class. The file is not opened
+        until the first use.
+
+        Parameters
+        ----------
+            location : str
+                The file path where the cache is stored.
+            ttl : float
+                Seconds an entry is fresh.
+        '''
+        self.location = location
+        self.ttl = ttl
+        self.connection = None
+
+
+    def __connect__(self) -> sqlite3.Connection:
+        '''
+        Opens the file and creates the table the first time it is called.
+
+        Returns
+        -------
+            sqlite3.Connection
+                The connection to the file.
+        '''
+        if self.connection is None:
+            connection = sqlite3.connect(self.location, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute(f'PRAGMA busy_timeout = {PERSISTENT_CACHE_BUSY_TIMEOUT}')
+            sql = '''CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY,
+                                                           response TEXT NOT NULL,
+                                                           fetched_at FLOAT NOT NULL
+                                                          );'''
+            connection.execute(sql)
+            connection.commit()
+            self.connection = connection
+            self.purge()
+        return self.connection
+
+
+    @staticmethod
+    def key(key: tuple) -> str:
+        '''
+        Returns the key of an entry in the file.
+
+        Parameters
+        ----------
+            key : tuple
+                The key of the lookup, like ('place', 'paris', 'm').
+
+        Returns
+        -------
+            str
+                The key of the entry.
+        '''
+        return ':'.join(str(value) for value in key)
+
+
+    def get(self, key: str) -> (dict, float):
+        '''
+        Returns the fresh response of a key.
+
+        Parameters
+        ----------
+            key : str
+                The key of the entry.
+
+        Returns
+        -------
+            (dict, float)
+                The JSON response and the epoch when it was fetched, or
+                (None, None) if there is not a fresh entry.
+        '''
+        query = 'SELECT response, fetched_at FROM responses WHERE key=? AND fetched_at > ?'
+        row = self.__connect__().execute(query, (key, time.time() - self.ttl)).fetchone()
+        if row is None:
+            return (None, None)
+        return (json.loads(row[0]), row[1])
+
+
+    def set(self, key: str, response: dict, fetched_at: float = None) -> NoReturn:
+        '''
+        Stores a response, replacing the previous one of the key.
+
+        Parameters
+        ----------
+            key : str
+                The key of the entry.
+            response : dict
+                The JSON response of the API.
+            fetched_at : float
+                The epoch when it was fetched, default now.
+        '''
+        if fetched_at is None:
+            fetched_at = time.time()
+
+        connection = self.__connect__()
+        query = 'INSERT OR REPLACE INTO responses (key, response, fetched_at) VALUES (?, ?, ?)'
+        connection.execute(query, (key, json.dumps(response), fetched_at))
+        connection.commit()
+
+
+    def purge(self) -> int:
+        '''
+        Removes the expired entries.
+
+        Returns
+        -------
+            int
+                Number of entries removed.
+        '''
+        connection = self.__connect__()
+        cursor = connection.execute('DELETE FROM responses WHERE fetched_at <= ?',
+                                    (time.time() - self.ttl,))
+        connection.commit()
+        return cursor.rowcount
+
+
+    def close(self) -> NoReturn:
+        '''
+        Closes the connection.
+        '''
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
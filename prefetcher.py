@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Callable, NoReturn
+from data_base import Database
+from executor import Executor
+from weather_api import AsyncWeatherApi
+from weather_cache import WeatherCache
+from gazetteer import Gazetteer
+
+'''
+Constants
+---------
+    The default settings of the Prefetcher class.
+'''
+PREFETCHER_DEFAULT_TOP = 50
+PREFETCHER_DEFAULT_WINDOW = 86400
+PREFETCHER_DEFAULT_INTERVAL = 60
+PREFETCHER_DEFAULT_LEAD = 120
+PREFETCHER_DEFAULT_BUDGET = 60
+
+'''
+Constants
+---------
+    The default number of places of a request. The free plans of weatherstack
+    reject the bulk queries, so they are only used when configured.
+'''
+PREFETCHER_DEFAULT_BULK = 1
+
+
+class Prefetcher:
+    '''
+    A background task that keeps the weather of the most requested places in
+    the cache. In every round it reads the top regions of the recent registers
+    and refreshes the ones that are missing or about to expire, so the popular
+    lookups are always cache hits. The calls to the API are limited by a
+    budget of requests per hour.
+
+    Attributes
+    ----------
+        wapi : AsyncWeatherApi
+            The API whose cache is refreshed.
+        db : Database
+            The database with the registers.
+        executor : Executor
+            Runs the queries to the database in its thread.
+        logger : Logger
+            The logger used to report the rounds.
+        gazetteer : Gazetteer
+            Turns the regions into the canonical queries of the /place
+            lookups, the regions it does not know are skipped. None uses the
+            names of the regions.
+        top : int
+            Number of regions kept warm.
+        window : float
+            Seconds of registers counted for the popularity.
+        interval : float
+            Seconds between rounds.
+        lead : float
+            Seconds before the expiry when an entry is refreshed.
+        budget : float
+            Maximum number of requests to the API per hour.
+        bulk_size : int
+            Maximum number of places of a request, 1 for the plans without bulk
+            queries.
+        tokens : float
+            Requests available now, they refill at budget per hour.
+        updated : float
+            The time when the tokens were refilled.
+        refreshed : int
+            Number of places refreshed.
+        failed : int
+            Number of places whose refresh failed.
+        clock : Callable[[], float]
+            The function that returns the current time in seconds.
+
+    Methods
+    -------
+        __init__(wapi, db, executor, logger, gazetteer=None, top=PREFETCHER_DEFAULT_TOP,
+                 window=PREFETCHER_DEFAULT_WINDOW, interval=PREFETCHER_DEFAULT_INTERVAL,
+                 lead=PREFETCHER_DEFAULT_LEAD, budget=PREFETCHER_DEFAULT_BUDGET,
+                 bulk_size=PREFETCHER_DEFAULT_BULK, clock=time.monotonic) -> NoReturn:
+            Constructor for the Prefetcher class.
+        run() -> NoReturn:
+            Runs a round every interval until it is cancelled.
+        prefetch() -> int:
+            Runs a single round and returns the number of places refreshed.
+        stats() -> dict:
+            Returns the counters of the prefetcher.
+    '''
+
+    def __init__(self, wapi: AsyncWeatherApi, db: Database, executor: Executor,
+                 logger: logging.Logger, gazetteer: Gazetteer = None,
+                 top: int = PREFETCHER_DEFAULT_TOP,
+                 window: float = PREFETCHER_DEFAULT_WINDOW,
+                 interval: float = PREFETCHER_DEFAULT_INTERVAL,
+                 lead: float = PREFETCHER_DEFAULT_LEAD,
+                 budget: float = PREFETCHER_DEFAULT_BUDGET,
+                 bulk_size: int = PREFETCHER_DEFAULT_BULK,
+                 clock: Callable[[], float] = time.monotonic) -> NoReturn:
+        '''
+        Constructor for the Prefetcher class.
+
+        Parameters
+        ----------
+            wapi : AsyncWeatherApi
+                The API whose cache is refreshed, it needs a cache.
+            db : Database
+                The database with the registers.
+            executor : Executor
+                Runs the queries to the database in its thread.
+            logger : logging.Logger
+                Logger object to report the rounds.
+            gazetteer : Gazetteer
+                Turns the regions into canonical queries, default None. The
+                regions it does not know are skipped.
+            top : int
+                Number of regions kept warm.
+            window : float
+                Seconds of registers counted for the popularity.
+            interval : float
+                Seconds between rounds, it should be lower than the lead.
+            lead : float
+                Seconds before the expiry when an entry is refreshed.
+            budget : float
+                Maximum number of requests to the API per hour.
+            bulk_size : int
+                Maximum number of places of a request, default 1, bulk queries
+                need a paid plan.
+            clock : Callable[[], float]
+                The function that returns the current time in seconds.
+
+        Raises
+        ------
+            AssertionError: if the API has no cache or the bulk size is lower than one.
+        '''
+        assert wapi.cache is not None, 'The prefetcher needs a weather cache.'
+        assert bulk_size >= 1, 'A request needs room for one place.'
+
+        self.wapi = wapi
+        self.db = db
+        self.executor = executor
+        self.logger = logger
+        self.gazetteer = gazetteer
+        self.top = top
+        self.window = window
+        self.interval = interval
+        self.lead = lead
+        self.budget = budget
+        self.bulk_size = bulk_size
+        self.tokens = budget
+        self.clock = clock
+        self.updated = clock()
+        self.refreshed = 0
+        self.failed = 0
+
+
+    async def run(self) -> NoReturn:
+        '''
+        Runs a round every interval until it is cancelled. The errors of a
+        round are logged and the next round runs anyway.
+        '''
+        while True:
+            try:
+                await self.prefetch()
+            except Exception as error:
+                self.logger.exception(f'Prefetch failed: {error}')
+            await asyncio.sleep(self.interval)
+
+
+    async def prefetch(self) -> int:
+        '''
+        Runs a single round: it refreshes the top regions that are missing in
+        the cache or expire within the lead, the most requested first, while
+        there is budget.
+
+        Returns
+        -------
+            int
+                Number of places refreshed.
+        '''
+        regions = await self.executor.run_db(self.db.get_top_regions,
+                                             int(time.time() - self.window), self.top)
+        queries = []
+        for region in regions:
+            query = region['region']
+            if self.gazetteer is not None:
+                # Without its country the name may resolve to a city of another
+                # country, so the places that do not resolve are skipped.
+                query = self.gazetteer.lookup(f"{region['region']} {region['country']}")
+                if query is None:
+                    continue
+            remaining = self.wapi.cache.remaining(WeatherCache.key(query, self.wapi.unit))
+            if remaining is None or remaining < self.lead:
+                queries.append(query)
+
+        queries = queries[:self.__take__(queries)]
+        if not queries:
+            return 0
+
+        results = await self.wapi.get_weather_many(queries, refresh=True, size=self.bulk_size)
+        failed = [query for query, weather in results.items() if isinstance(weather, Exception)]
+        refreshed = len(results) - len(failed)
+        self.refreshed += refreshed
+        self.failed += len(failed)
+        if failed:
+            self.logger.warning(f'Prefetch failed for {failed}')
+        self.logger.info(f'Prefetched {refreshed} of {len(regions)} top places')
+        return refreshed
+
+
+    def __take__(self, queries: list) -> int:
+        '''
+        Takes the requests of as many queries as the budget allows.
+
+        Parameters
+        ----------
+            queries : list
+                The queries to refresh, the most important first.
+
+        Returns
+        -------
+            int
+                The number of queries that can be refreshed.
+        '''
+        now = self.clock()
+        self.tokens = min(self.budget, self.tokens + (now - self.updated) * self.budget / 3600)
+        self.updated = now
+
+        requests = min(math.ceil(len(queries) / self.bulk_size), int(self.tokens))
+        self.tokens -= requests
+        return min(len(queries), requests * self.bulk_size)
+
+
+    def stats(self) -> dict:
+        '''
+        Returns the counters of the prefetcher.
+
+        Returns
+        -------
+            dict
+                {'refreshed': int, 'failed': int, 'tokens': float}
+        '''
+        return {'refreshed': self.refreshed, 'failed': self.failed,
+                'tokens': round(self.tokens, 2)}
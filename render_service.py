@@ -0,0 +1,276 @@
+import asyncio
+import os
+import time
+from typing import NoReturn
+from assets import AssetRegistry
+from card_cache import CardCache
+from encoder import Encoder
+from interface import Interface, warm_up_layout
+from executor import Executor
+from single_flight import SingleFlight
+from weather_report import WeatherReport
+
+'''
+Worker state
+------------
+    The assets loaded once by init_worker in every worker process.
+'''
+WORKER_ASSETS = AssetRegistry()
+
+
+def init_worker() -> NoReturn:
+    '''
+    Warms up a worker process, loading the font, the backgrounds and the icons
+    once, so the renders of the worker do not read them from disk, blurring
+    the panel of every background, scaling every icon and rasterizing every
+    label.
+    '''
+    WORKER_ASSETS.warm_up()
+    warm_up_layout(WORKER_ASSETS)
+
+
+def render_card(report: WeatherReport, generation: int = 0, encoder: Encoder = None) -> (bytes, float):
+    '''
+    Makes the image for a report in a worker process.
+
+    Parameters
+    ----------
+        report : WeatherReport
+            The weather drawn in the card.
+        generation : int
+            The generation of the assets, the worker reloads its assets when
+            it is behind.
+        encoder : Encoder
+            The encoder of the card, default None, a PNG.
+
+    Returns
+    -------
+        (bytes, float)
+            The encoded image and the seconds spent encoding it.
+    '''
+    if WORKER_ASSETS.generation < generation:
+        WORKER_ASSETS.reload()
+        WORKER_ASSETS.generation = generation
+        warm_up_layout(WORKER_ASSETS)
+
+    interface = Interface(report, assets=WORKER_ASSETS)
+    interface.set_background()
+    interface.make_imagen()
+
+    start = time.perf_counter()
+    card = interface.encode_imagen() if encoder is None else encoder.encode(interface)
+    return (card, time.perf_counter() - start)
+
+
+def ping() -> int:
+    '''
+    Does nothing, it is used to start the worker processes.
+
+    Returns
+    -------
+        int
+            The pid of the worker.
+    '''
+    return os.getpid()
+
+
+class RenderService:
+    '''
+    This class renders the weather cards in the process pool of an Executor,
+    so the rendering scales with the number of cores. The cards can be kept in
+    a CardCache, so a card drawn again is not rendered, and the identical
+    renders in flight are coalesced.
+
+    Attributes
+    ----------
+        executor : Executor
+            The executor whose process pool renders the cards, it must be
+            created with init_worker as cpu_initializer.
+        workers : int
+            The number of worker processes.
+        generation : int
+            The generation of the assets, it is increased to reload them.
+        cache : CardCache
+            The rendered cards, None disables it.
+        encoder : Encoder
+            The encoder of the cards.
+        flight : SingleFlight
+            Coalesces the identical renders in flight.
+        rendered : int
+            Number of cards rendered.
+        encoded_bytes : int
+            Number of bytes of the cards rendered.
+        encode_time : float
+            Seconds the workers spent encoding the cards rendered.
+
+    Methods
+    -------
+        __init__(executor: Executor, workers: int, cache: CardCache = None,
+                 encoder: Encoder = None) -> NoReturn:
+            Constructor for the RenderService class.
+        warm_up() -> NoReturn:
+            Starts and initializes every worker process.
+        reload() -> NoReturn:
+            Makes every worker reload its assets before its next card.
+        key(report: WeatherReport) -> str:
+            Returns the key of the card of a report.
+        render(report: WeatherReport) -> bytes:
+            Renders the card of a report and returns the encoded image.
+        stats() -> dict:
+            Returns the counters of the cards rendered.
+    '''
+
+    def __init__(self, executor: Executor, workers: int, cache: CardCache = None,
+                 encoder: Encoder = None) -> NoReturn:
+        '''
+        Constructor for the RenderService class.
+
+        Parameters
+        ----------
+            executor : Executor
+                The executor whose process pool renders the cards.
+            workers : int
+                The number of worker processes of the pool.
+            cache : CardCache
+                The rendered cards, its disk is used from the database thread
+                of the executor. Default None, every card is rendered.
+            encoder : Encoder
+                The encoder of the cards, default a full size PNG.
+        '''
+        self.executor = executor
+        self.workers = workers
+        self.generation = 0
+        self.cache = cache
+        self.encoder = encoder if encoder is not None else Encoder()
+        self.flight = SingleFlight()
+        self.rendered = 0
+        self.encoded_bytes = 0
+        self.encode_time = 0.0
+
+
+    async def warm_up(self) -> NoReturn:
+        '''
+        Starts and initializes every worker process, so the first cards do not
+        wait for it.
+        '''
+        # The pool starts a new process for every job sent while no worker is idle.
+        await asyncio.gather(*(self.executor.run_cpu(ping) for _ in range(self.workers)))
+
+
+    def reload(self) -> NoReturn:
+        '''
+        Makes every worker reload its assets from disk before its next card,
+        so new backgrounds or icons are used without a restart. The cached
+        cards of the old assets are no longer used, their key includes the
+        generation.
+        '''
+        self.generation += 1
+
+
+    def key(self, report: WeatherReport) -> str:
+        '''
+        Returns the key of the card of a report with the current assets, the
+        same card always gets the same key.
+
+        Parameters
+        ----------
+            report : WeatherReport
+                The weather drawn in the card.
+
+        Returns
+        -------
+            str
+                The key of the card.
+        '''
+        return CardCache.key(report, self.generation, self.encoder.key())
+
+
+    async def render(self, report: WeatherReport) -> bytes:
+        '''
+        Renders the card of a report, or returns it from the cache.
+
+        Parameters
+        ----------
+            report : WeatherReport
+                The weather drawn in the card.
+
+        Returns
+        -------
+            bytes
+                The encoded image.
+        '''
+        if self.cache is None:
+            return await self.__render_card__(report)
+
+        key = self.key(report)
+        card = self.cache.get(key)
+        if card is not None:
+            return card
+        return await self.flight.do(key, lambda: self.__render__(key, report))
+
+
+    async def __render__(self, key: str, report: WeatherReport) -> bytes:
+        '''
+        Loads a card spilled by the cache or renders it, and stores it in the
+        cache.
+
+        Parameters
+        ----------
+            key : str
+                The key of the card.
+            report : WeatherReport
+                The weather drawn in the card.
+
+        Returns
+        -------
+            bytes
+                The encoded image.
+        '''
+        card = None
+        if self.cache.directory is not None:
+            card = await self.executor.run_db(self.cache.load, key)
+        if card is None:
+            card = await self.__render_card__(report)
+
+        evicted = self.cache.set(key, card)
+        if evicted and self.cache.directory is not None:
+            await self.executor.run_db(self.cache.spill, evicted)
+        return card
+
+
+    async def __render_card__(self, report: WeatherReport) -> bytes:
+        '''
+        Renders a card in a worker process and records its size and the time
+        spent encoding it.
+
+        Parameters
+        ----------
+            report : WeatherReport
+                The weather drawn in the card.
+
+        Returns
+        -------
+            bytes
+                The encoded image.
+        '''
+        card, seconds = await self.executor.run_cpu(render_card, report, self.generation, self.encoder)
+        self.rendered += 1
+        self.encoded_bytes += len(card)
+        self.encode_time += seconds
+        return card
+
+
+    def stats(self) -> dict:
+        '''
+        Returns the counters of the cards rendered.
+
+        Returns
+        -------
+            dict
+                {'rendered': int, 'bytes': int, 'bytes_per_card': int,
+                 'encode_ms_per_card': float}
+        '''
+        rendered = max(self.rendered, 1)
+        return {'rendered': self.rendered, 'bytes': self.encoded_bytes,
+                'bytes_per_card': self.encoded_bytes // rendered,
+                'encode_ms_per_card': round(1000 * self.encode_time / rendered, 2)}
@@ -0,0 +1,336 @@
+import asyncio
+import random
+import time
+import httpx
+from typing import Any, Awaitable, Callable, NoReturn
+from weatherstack_api_error import WeatherStackAPIError
+from weather_unavailable_error import WeatherUnavailableError
+
+'''
+Constants
+---------
+    The default settings of the CircuitBreaker class.
+'''
+CIRCUIT_BREAKER_DEFAULT_THRESHOLD = 5
+CIRCUIT_BREAKER_DEFAULT_RESET_TIMEOUT = 30
+
+'''
+Constants
+---------
+    The default settings of the Resilience class.
+'''
+RESILIENCE_DEFAULT_RETRIES = 2
+RESILIENCE_DEFAULT_BASE_DELAY = 0.2
+RESILIENCE_DEFAULT_MAX_DELAY = 2.0
+RESILIENCE_DEFAULT_DEADLINE = 15.0
+
+'''
+Constants
+---------
+    The errors that are worth a retry: network errors, timeouts, invalid
+    responses and HTTP status errors. Of the status errors only the server
+    errors and the status codes below are retried, the other client errors
+    are about the request.
+'''
+RESILIENCE_TRANSIENT_ERRORS = (httpx.TransportError, httpx.HTTPStatusError, ValueError)
+RESILIENCE_TRANSIENT_STATUS = (429,)
+
+
+class CircuitBreaker:
+    '''
+    Fails fast while the upstream is down. After a number of consecutive
+    failures the circuit opens and every call is rejected, once the reset
+    timeout passes a single trial call is allowed (half open), if it works the
+    circuit closes again.
+
+    Attributes
+    ----------
+        threshold : int
+            Consecutive failures that open the circuit.
+        reset_timeout : float
+            Seconds the circuit stays open before a trial call.
+        failures : int
+            Current number of consecutive failures.
+        opened_at : float
+            The time when the circuit opened, None if it is closed.
+        trial : bool
+            True while the trial call of the half open circuit is running.
+        rejected : int
+            Number of calls rejected while the circuit was open.
+        clock : Callable[[], float]
+            The function that returns the current time in seconds.
+
+    Methods
+    -------
+        __init__(threshold=CIRCUIT_BREAKER_DEFAULT_THRESHOLD,
+                 reset_timeout=CIRCUIT_BREAKER_DEFAULT_RESET_TIMEOUT,
+                 clock=time.monotonic) -> NoReturn:
+            Constructor for the CircuitBreaker class.
+        state() -> str:
+            Returns 'closed', 'open' or 'half_open'.
+        allow() -> bool:
+            Returns True if a call can be made.
+        record_success() -> NoReturn:
+            Closes the circuit.
+        record_failure() -> NoReturn:
+            Counts a failure, opening the circuit at the threshold.
+    '''
+
+    def __init__(self, threshold: int = CIRCUIT_BREAKER_DEFAULT_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_BREAKER_DEFAULT_RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic) -> NoReturn:
+        '''
+        Constructor for the CircuitBreaker class.
+
+        Parameters
+        ----------
+            threshold : int
+                Consecutive failures that open the circuit.
+            reset_timeout : float
+                Seconds the circuit stays open before a trial call.
+            clock : Callable[[], float]
+                The function that returns the current time in seconds.
+        '''
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.rejected = 0
+        self.clock = clock
+
+
+    def state(self) -> str:
+        '''
+        Returns the state of the circuit.
+
+        Returns
+        -------
+            str
+                'closed', 'open' or 'half_open'.
+        '''
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+
+    def allow(self) -> bool:
+        '''
+        Returns True if a call can be made. In the half open state only the
+        first caller is allowed, it is the trial call.
+
+        Returns
+        -------
+            bool
+                True if the call can be made, False if it must fail fast.
+        '''
+        state = self.state()
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self.trial:
+            self.trial = True
+            return True
+        self.rejected += 1
+        return False
+
+
+    def record_success(self) -> NoReturn:
+        '''
+        Closes the circuit.
+        '''
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+
+    def record_failure(self) -> NoReturn:
+        '''
+        Counts a failure, opening the circuit at the threshold or if the trial
+        call failed.
+        '''
+        self.failures += 1
+        if self.trial or self.failures >= self.threshold:
+            self.opened_at = self.clock()
+        self.trial = False
+
+
+class Resilience:
+    '''
+    Runs the calls to the upstream with a deadline, jittered exponential
+    retries for the transient errors and a circuit breaker.
+
+    Attributes
+    ----------
+        retries : int
+            Number of retries after the first attempt.
+        base_delay : float
+            Seconds of the first backoff, it doubles in every retry.
+        max_delay : float
+            Maximum seconds of a backoff.
+        deadline : float
+            Maximum seconds of a call, with all its retries.
+        breaker : CircuitBreaker
+            The circuit breaker of the upstream.
+        retried : int
+            Number of retries made.
+
+    Methods
+    -------
+        __init__(retries=RESILIENCE_DEFAULT_RETRIES, base_delay=RESILIENCE_DEFAULT_BASE_DELAY,
+                 max_delay=RESILIENCE_DEFAULT_MAX_DELAY, deadline=RESILIENCE_DEFAULT_DEADLINE,
+                 breaker=None) -> NoReturn:
+            Constructor for the Resilience class.
+        call(func) -> Any:
+            Runs a call to the upstream.
+        is_transient(error: Exception) -> bool:
+            Returns True if an error is worth a retry.
+        stats() -> dict:
+            Returns the counters of the calls.
+    '''
+
+    def __init__(self, retries: int = RESILIENCE_DEFAULT_RETRIES,
+                 base_delay: float = RESILIENCE_DEFAULT_BASE_DELAY,
+                 max_delay: float = RESILIENCE_DEFAULT_MAX_DELAY,
+                 deadline: float = RESILIENCE_DEFAULT_DEADLINE,
+                 breaker: CircuitBreaker = None) -> NoReturn:
+        '''
+        Constructor for the Resilience class.
+
+        Parameters
+        ----------
+            retries : int
+                Number of retries after the first attempt.
+            base_delay : float
+                Seconds of the first backoff.
+            max_delay : float
+                Maximum seconds of a backoff.
+            deadline : float
+                Maximum seconds of a call, with all its retries.
+            breaker : CircuitBreaker
+                The circuit breaker of the upstream, default a new one.
+        '''
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.retried = 0
+
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        '''
+        Runs a call to the upstream.
+
+        Parameters
+        ----------
+            func : Callable[[], Awaitable[Any]]
+                A function without arguments that returns the coroutine of a
+                single attempt.
+
+        Returns
+        -------
+            Any
+                The value returned by the coroutine.
+
+        Raises
+        ------
+            WeatherUnavailableError: if the circuit is open, the deadline passed
+                or every attempt failed.
+            WeatherStackAPIError: if the API answered with an error.
+        '''
+        if not self.breaker.allow():
+            raise WeatherUnavailableError('The circuit breaker is open.')
+        # Only the half open trial call leaves the trial flag set.
+        trial = self.breaker.trial
+
+        try:
+            return await asyncio.wait_for(self.__attempts__(func), self.deadline)
+        except asyncio.TimeoutError as error:
+            self.breaker.record_failure()
+            raise WeatherUnavailableError('The deadline of the call passed.') from error
+        except asyncio.CancelledError:
+            # A cancelled trial call must not keep the circuit half open.
+            if trial:
+                self.breaker.trial = False
+            raise
+
+
+    async def __attempts__(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        '''
+        Runs the attempts of a call, with a jittered exponential backoff
+        between them.
+
+        Parameters
+        ----------
+            func : Callable[[], Awaitable[Any]]
+                A function without arguments that returns the coroutine of a
+                single attempt.
+
+        Returns
+        -------
+            Any
+                The value returned by the coroutine.
+        '''
+        attempt = 0
+        while True:
+            try:
+                result = await func()
+            except WeatherStackAPIError:
+                # The upstream is working, the error is about the request.
+                self.breaker.record_success()
+                raise
+            except RESILIENCE_TRANSIENT_ERRORS as error:
+                if not self.is_transient(error):
+                    # The upstream is working, the request was rejected.
+                    self.breaker.record_success()
+                    raise WeatherUnavailableError(f'The request was rejected: {error}') from error
+                if attempt >= self.retries:
+                    self.breaker.record_failure()
+                    raise WeatherUnavailableError(f'The call failed {attempt + 1} times.') from error
+                # Full jitter, so the retries of many callers do not align.
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+                attempt += 1
+                self.retried += 1
+                continue
+
+            self.breaker.record_success()
+            return result
+
+
+    @staticmethod
+    def is_transient(error: Exception) -> bool:
+        '''
+        Returns True if an error of RESILIENCE_TRANSIENT_ERRORS is worth a
+        retry, the HTTP status errors only for the server errors and
+        RESILIENCE_TRANSIENT_STATUS.
+
+        Parameters
+        ----------
+            error : Exception
+                The error of an attempt.
+
+        Returns
+        -------
+            bool
+                True if the attempt can be retried.
+        '''
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status >= 500 or status in RESILIENCE_TRANSIENT_STATUS
+        return True
+
+
+    def stats(self) -> dict:
+        '''
+        Returns the counters of the calls.
+
+        Returns
+        -------
+            dict
+                {'state': str, 'retried': int, 'rejected': int}
+        '''
+        return {'state': self.breaker.state(), 'retried': self.retried,
+                'rejected': self.breaker.rejected}
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, NoReturn
+
+
+class SingleFlight:
+    '''
+    Coalesces identical calls in flight: while a call for a key is running,
+    the later callers with the same key await its result instead of starting
+    a new call.
+
+    Attributes
+    ----------
+        calls : dict
+            The running calls by key.
+        executed : int
+            Number of calls started.
+        coalesced : int
+            Number of callers that awaited a call started by another caller.
+
+    Methods
+    -------
+        __init__() -> NoReturn:
+            Constructor for the SingleFlight class.
+        do(key, func) -> Any:
+            Runs func once for all the concurrent callers with the same key.
+        stats() -> dict:
+            Returns the counters of the calls.
+    '''
+
+    def __init__(self) -> NoReturn:
+        '''
+        Constructor for the SingleFlight class.
+        '''
+        self.calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        '''
+        Runs func once for all the concurrent callers with the same key. Every
+        caller gets the same result, or the same exception.
+
+        Parameters
+        ----------
+            key : Hashable
+                The key that identifies identical calls.
+            func : Callable[[], Awaitable[Any]]
+                A function without arguments that returns the coroutine to run.
+
+        Returns
+        -------
+            Any
+                The value returned by the coroutine.
+        '''
+        task = self.calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(func())
+            self.calls[key] = task
+            task.add_done_callback(lambda task: self.__done__(key, task))
+
+        # A cancelled caller must not cancel the call of the other callers.
+        return await asyncio.shield(task)
+
+
+    def __done__(self, key: Hashable, task: asyncio.Task) -> NoReturn:
+        '''
+        Removes a finished call, so the next caller starts a new one.
+
+        Parameters
+        ----------
+            key : Hashable
+                The key of the call.
+            task : asyncio.Task
+                The finished call.
+        '''
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved, every caller may be gone.
+            task.exception()
+
+
+    def stats(self) -> dict:
+        '''
+        Returns the counters of the calls.
+
+        Returns
+        -------
+            dict
+                {'in_flight': int, 'executed': int, 'coalesced': int}
+        '''
+        return {'in_flight': len(self.calls), 'executed': self.executed,
+                'coalesced': self.coalesced}
@@ -0,0 +1,243 @@
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import Loader, MetaPathFinder
+from typing import Any, Callable, Iterator, NoReturn
+
+try:
+    import resource
+except ImportError:
+    # Only on Unix, the peak memory is not reported elsewhere.
+    resource = None
+
+'''
+Constants
+---------
+    The number of modules reported by the StartupProfile class.
+'''
+STARTUP_PROFILE_DEFAULT_TOP = 25
+
+
+class TimedLoader(Loader):
+    '''
+    Wraps the loader of a module to time its import, the loader is restored
+    once the module is loaded.
+
+    Attributes
+    ----------
+        loader : Loader
+            The original loader of the module.
+        profile : StartupProfile
+            The profile that records the time.
+
+    Methods
+    -------
+        __init__(loader: Loader, profile: StartupProfile) -> NoReturn:
+            Constructor for the TimedLoader class.
+        create_module(spec) -> Any:
+            Creates the module with the original loader.
+        exec_module(module) -> NoReturn:
+            Runs the module with the original loader and records the time.
+    '''
+
+    def __init__(self, loader: Loader, profile: 'StartupProfile') -> NoReturn:
+        '''
+        Constructor for the TimedLoader class.
+
+        Parameters
+        ----------
+            loader : Loader
+                The original loader of the module.
+            profile : StartupProfile
+                The profile that records the time.
+        '''
+        self.loader = loader
+        self.profile = profile
+
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.loader, name)
+
+
+    def create_module(self, spec) -> Any:
+        '''
+        Creates the module with the original loader, the extension modules
+        are loaded here.
+        '''
+        with self.profile.timed(spec.name):
+            return self.loader.create_module(spec)
+
+
+    def exec_module(self, module) -> NoReturn:
+        '''
+        Runs the module with the original loader, and then restores it.
+        '''
+        try:
+            with self.profile.timed(module.__name__):
+                self.loader.exec_module(module)
+        finally:
+            module.__loader__ = self.loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self.loader
+
+
+class StartupProfile(MetaPathFinder):
+    '''
+    Measures the startup of the bot: the time of every import, found with a
+    finder at the start of sys.meta_path, and the time of every phase of the
+    initialization. The import time of a module does not include the modules
+    it imports, they are counted on their own.
+
+    Attributes
+    ----------
+        imports : dict
+            The seconds spent importing every module.
+        phases : dict
+            The seconds of every phase of the initialization, in order.
+        stack : list
+            The imports running, [name, start, seconds of its imports].
+        started : float
+            The time when the profile was installed.
+        clock : Callable[[], float]
+            The function that returns the current time in seconds.
+
+    Methods
+    -------
+        __init__(clock=time.perf_counter) -> NoReturn:
+            Constructor for the StartupProfile class.
+        install() -> NoReturn:
+            Starts timing the imports.
+        uninstall() -> NoReturn:
+            Stops timing the imports.
+        find_spec(name, path, target=None) -> ModuleSpec:
+            Finds a module with the other finders and times its loader.
+        timed(name: str) -> Iterator:
+            Context manager that records the import time of a module.
+        phase(name: str) -> Iterator:
+            Context manager that records the time of a phase.
+        report(top=STARTUP_PROFILE_DEFAULT_TOP) -> str:
+            Returns the slowest imports and the phases as text.
+    '''
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> NoReturn:
+        '''
+        Constructor for the StartupProfile class.
+
+        Parameters
+        ----------
+            clock : Callable[[], float]
+                The function that returns the current time in seconds.
+        '''
+        self.imports = {}
+        self.phases = {}
+        self.stack = []
+        self.clock = clock
+        self.started = clock()
+
+
+    def install(self) -> NoReturn:
+        '''
+        Starts timing the imports, only the modules imported from now on are
+        measured.
+        '''
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+
+    def uninstall(self) -> NoReturn:
+        '''
+        Stops timing the imports.
+        '''
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+    def find_spec(self, name: str, path, target=None):
+        '''
+        Finds a module with the other finders and wraps its loader, so the
+        import is timed.
+
+        Returns
+        -------
+            ModuleSpec
+                The spec of the module, None if no finder found it.
+        '''
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and not isinstance(spec.loader, TimedLoader):
+                    spec.loader = TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        '''
+        Records the import time of a module, without the time of the modules
+        it imports.
+
+        Parameters
+        ----------
+            name : str
+                The name of the module.
+        '''
+        frame = [name, self.clock(), 0.0]
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            elapsed = self.clock() - frame[1]
+            self.imports[name] = self.imports.get(name, 0.0) + elapsed - frame[2]
+            if self.stack:
+                self.stack[-1][2] += elapsed
+
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        '''
+        Records the time of a phase of the initialization.
+
+        Parameters
+        ----------
+            name : str
+                The name of the phase.
+        '''
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + self.clock() - start
+
+
+    def report(self, top: int = STARTUP_PROFILE_DEFAULT_TOP) -> str:
+        '''
+        Returns the slowest imports, the phases and the peak memory as text.
+
+        Parameters
+        ----------
+            top : int
+                Number of modules reported.
+
+        Returns
+        -------
+            str
+                The report.
+        '''
+        lines = [f'Startup: {1000 * (self.clock() - self.started):.1f} ms, '
+                 f'{len(self.imports)} modules imported in {1000 * sum(self.imports.values()):.1f} ms']
+        lines.append('Slowest imports:')
+        for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f'    {1000 * seconds:8.1f} ms  {name}')
+        lines.append('Phases:')
+        for name, seconds in self.phases.items():
+            lines.append(f'    {1000 * seconds:8.1f} ms  {name}')
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+            scale = 1 if sys.platform == 'darwin' else 1024
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+            lines.append(f'Peak memory: {peak / 2 ** 20:.1f} MiB')
+        return '\n'.join(lines)
@@ -14,10 +14,11 @@ if __version_info__ < (20, 0, 0, 'alpha', 1):
         f'visit https://docs.python-telegram-bot.org/en/v{TG_VER}/examples.html'
     )
 
-from telegram.error import Forbidden, NetworkError
+from telegram.error import BadRequest, Forbidden, NetworkError
 from telegram.constants import MessageEntityType
 from telegram import Bot, Update
-from typing import NoReturn
+from typing import AsyncIterator, NoReturn, Tuple, Union
+from collections import OrderedDict
 from enum import Enum
 
 '''
@@ -26,9 +27,11 @@ Constants
     Different husefully constants.
 '''
 TELEGRAM_BOT_TIMEOUT = 2
+TELEGRAM_BOT_UPDATES_LIMIT = 100
 TELEGRAM_BOT_HELP_COMMAND = '/HELP'
 TELEGRAM_BOT_START_COMMAND = '/START'
 TELEGRAM_BOT_PLACE_COMMAND = '/PLACE'
+TELEGRAM_BOT_FILE_ID_CACHE_SIZE = 4096
 
 TELEGRAM_BOT_HELP_TEXT = '''\
 *********** The twister Bot ***********
@@ -75,36 +78,60 @@ class TelegramBot:
         update_id : int
             An integer representing the ID of the latest update processed.
         updates : (Update)
-            A tuple of Update objects representing the updates received by the
-            Telegram bot associated.
+            A tuple of Update objects representing the last batch of updates
+            received by the Telegram bot associated.
         logger : Logger
             The logger used to log messages and events related to this instance.
         current_update : Update
             This attribute is updated whenever a new update is received and
             processed by the wait_message method.
+        file_ids : OrderedDict
+            The Telegram file_id of the cards already uploaded, by the key of
+            the card, from the least to the most recently used.
+        file_id_size : int
+            Maximum number of file_ids kept, 0 disables the reuse.
+        reused : int
+            Number of cards sent by file_id, without uploading them.
+        uploaded : int
+            Number of cards uploaded.
 
     Methods
     -------
-        __init__(logger) -> NoReturn:
+        __init__(logger, file_id_size=TELEGRAM_BOT_FILE_ID_CACHE_SIZE) -> NoReturn:
             Initializes the class and sets up the telegram bot.
         filter_update(update) -> MessageType:
             Filters the updates received by the bot and determines the type of
             message received.
-        wait_message() -> MessageType:
-            Waits for a new message from the user and returns the type of message received.
-        send_help() -> NoReturn:
+        fetch_updates() -> (Update):
+            Waits for a new batch of updates and acknowledges all of them.
+        classify_update(update) -> MessageType:
+            Sets the current update and returns its type.
+        iter_updates() -> AsyncIterator[(MessageType, Update)]:
+            Iterates over the classified updates, one batch per request.
+        send_help(update=None) -> NoReturn:
             Sends a help message to the user.
-        send_start() -> NoReturn:
+        send_start(update=None) -> NoReturn:
             Sends a start message to the user.
-        send_weather(img_path) -> NoReturn:
-            Sends a photo to the user.
-        get_current_user() -> dict:
+        send_weather(photo, update=None, key=None) -> NoReturn:
+            Sends a photo to the user, from a path or from memory.
+        send_cached_weather(key, update=None) -> bool:
+            Sends a card already uploaded by its file_id.
+        send_message(message, update=None) -> NoReturn:
+            Sends a text message to the user.
+        get_current_user(update=None) -> dict:
             Returns a dictionary with the current user's information.
-        ignore_current_message() -> NoReturn:
+        ignore_current_message(update=None) -> NoReturn:
             Ignores the current message received.
+        set_webhook(url, secret=None) -> NoReturn:
+            Tells Telegram to POST the updates to a webhook.
+        delete_webhook() -> NoReturn:
+            Removes the webhook to receive the updates by polling.
+        stats() -> dict:
+            Returns the counters of the uploads.
     '''
 
-    def __init__(self, logger: logging.Logger) -> NoReturn:
+    def __init__(self, logger: logging.Logger,
+                 file_id_size: int = TELEGRAM_BOT_FILE_ID_CACHE_SIZE) -> NoReturn:
         '''
         Constructor of the TelegramBot class.
 
@@ -112,12 +139,19 @@ class TelegramBot:
         ----------
             logger : logging.Logger
                 Logger object to log events in the bot.
+            file_id_size : int
+                Maximum number of file_ids of uploaded cards kept, 0 disables
+                the reuse.
         '''
         self.bot = Bot(os.environ['TELEGRAM_TOKEN'])
         self.update_id = None
         self.updates = ()
         self.logger = logger
         self.current_update = None
+        self.file_ids = OrderedDict()
+        self.file_id_size = file_id_size
+        self.reused = 0
+        self.uploaded = 0
 
         self.logger.info('Listening for new messages...')
 
@@ -152,15 +186,16 @@ class TelegramBot:
             return MessageType.MENSAGGE_TYPE_NO_SUPPORT
 
 
-    async def wait_menssage(self) -> MessageType:
+    async def fetch_updates(self) -> tuple:
         '''
-        This method waits for new messages to arrive and returns the type of message
-        received.
+        This method waits until Telegram returns new updates and acknowledges the
+        whole batch with a single offset, so every update returned by the server
+        is processed without a new round trip.
 
         Returns:
         --------
-            MessageType:
-                An Enum representing the type of message received.
+            tuple:
+                The batch of Update objects received, in the order they arrived.
         '''
         try:
             if self.update_id is None:
@@ -173,77 +208,187 @@ class TelegramBot:
         while True:
             try:
                 self.updates = await self.bot.get_updates(offset=self.update_id,
+                                                          limit=TELEGRAM_BOT_UPDATES_LIMIT,
                                                           timeout=TELEGRAM_BOT_TIMEOUT)
             except NetworkError:
                 await asyncio.sleep(1)
+                continue
             except Forbidden:
                 # The user has removed or blocked the bot.
                 self.update_id += 1
+                continue
 
             if self.updates != ():
-                self.current_update = self.updates[0]
-                self.update_id = self.current_update.update_id
-                break
+                # The batch is acknowledged as soon as it is received, so the
+                # next call does not wait for these updates to be answered.
+                self.update_id = self.updates[-1].update_id + 1
+                return self.updates
 
-        type = await self.filter_update(self.current_update)
-        if not type is  MessageType.MENSAGGE_TYPE_NO_SUPPORT:
-            user = self.current_update.message.from_user.username
+
+    async def classify_update(self, update: Update) -> MessageType:
+        '''
+        Sets the update as the current update and returns its type.
+
+        Parameters
+        ----------
+            update : Update
+                That contains information about the message sent by the user.
+
+        Returns
+        -------
+            MessageType
+                Type of command sent by the user.
+        '''
+        self.current_update = update
+        type = await self.filter_update(update)
+        if not type is MessageType.MENSAGGE_TYPE_NO_SUPPORT:
+            user = update.message.from_user.username
             self.logger.info(f'New message from: {user} type: {type}')
         return type
 
 
-    async def send_help(self) -> NoReturn:
+    async def iter_updates(self) -> AsyncIterator[Tuple[MessageType, Update]]:
+        '''
+        Iterates forever over the messages received, one batch of updates per
+        request to Telegram.
+
+        Yields:
+        -------
+            (MessageType, Update):
+                The type of message received and the update that contains it.
+        '''
+        while True:
+            for update in await self.fetch_updates():
+                yield (await self.classify_update(update), update)
+
+
+    async def send_help(self, update: Update = None) -> NoReturn:
         '''
         This method sends the help message to the user.
+
+        Parameters:
+        -----------
+            update: Update
+                The update to reply, default is the current update.
         '''
-        self.update_id += 1
-        await self.current_update.message.reply_text(TELEGRAM_BOT_HELP_TEXT)
-        user = self.current_update.message.from_user.username
+        update = update or self.current_update
+        await update.message.reply_text(TELEGRAM_BOT_HELP_TEXT)
+        user = update.message.from_user.username
         self.logger.info(f'It has replied to: {user}.')
 
 
-    async def send_start(self) -> NoReturn:
+    async def send_start(self, update: Update = None) -> NoReturn:
         '''
         This method sends the start message to the user.
+
+        Parameters:
+        -----------
+            update: Update
+                The update to reply, default is the current update.
         '''
-        self.update_id += 1
-        await self.current_update.message.reply_text(TELEGRAM_BOT_START_TEXT)
-        user = self.current_update.message.from_user.username
+        update = update or self.current_update
+        await update.message.reply_text(TELEGRAM_BOT_START_TEXT)
+        user = update.message.from_user.username
         self.logger.info(f'It has replied to: {user}.')
 
 
-    async def send_weather(self, img_path: str) -> NoReturn:
+    async def send_weather(self, photo: Union[str, bytes, memoryview], update: Update = None,
+                           key: str = None) -> NoReturn:
         '''
         This method sends the current weather to the user.
 
         Parameters:
         -----------
-            img_path: str
-                The path of the image containing the weather information.
+            photo: str, bytes or memoryview
+                The path of the image containing the weather information, or the
+                encoded image, which is uploaded from memory.
+            update: Update
+                The update to reply, default is the current update.
+            key: str
+                The key of the card, its file_id is kept to send it again
+                without uploading it. Default None, it is not kept.
         '''
-        self.update_id += 1
-        await self.current_update.message.reply_photo(photo=img_path)
-        user = self.current_update.message.from_user.username
+        update = update or self.current_update
+        if isinstance(photo, memoryview):
+            # Telegram only uploads paths, files and bytes.
+            photo = photo.tobytes()
+        sent = await update.message.reply_photo(photo=photo)
+        self.uploaded += 1
+        if key is not None and self.file_id_size > 0 and sent.photo:
+            # The last size is the original image.
+            self.file_ids[key] = sent.photo[-1].file_id
+            self.file_ids.move_to_end(key)
+            while len(self.file_ids) > self.file_id_size:
+                self.file_ids.popitem(last=False)
+        user = update.message.from_user.username
         self.logger.info(f'It has replied to: {user}.')
 
-    async def send_message(self, message: str) -> NoReturn:
+
+    async def send_cached_weather(self, key: str, update: Update = None) -> bool:
         '''
-        This method sends the current weather to the user.
+        This method sends a card already uploaded, by its file_id, so it is
+        not rendered nor uploaded again. A file_id rejected by Telegram is
+        forgotten.
+
+        Parameters:
+        -----------
+            key: str
+                The key of the card.
+            update: Update
+                The update to reply, default is the current update.
+
+        Returns:
+        --------
+            bool:
+                True if the card was sent, False if it has to be uploaded.
+        '''
+        file_id = self.file_ids.get(key)
+        if file_id is None:
+            return False
+
+        # It is marked as used before the await, other chats may evict while
+        # the photo is sent.
+        self.file_ids.move_to_end(key)
+        update = update or self.current_update
+        try:
+            await update.message.reply_photo(photo=file_id)
+        except BadRequest as error:
+            if self.file_ids.get(key) == file_id:
+                del self.file_ids[key]
+            self.logger.warning(f'File id rejected: {error}')
+            return False
+
+        self.reused += 1
+        user = update.message.from_user.username
+        self.logger.info(f'It has replied to: {user}.')
+        return True
+
+
+    async def send_message(self, message: str, update: Update = None) -> NoReturn:
+        '''
+        This method sends a text message to the user.
 
         Parameters:
         -----------
-            img_path: str
-                The path of the image containing the weather information.
+            message: str
+                The text to send.
+            update: Update
+                The update to reply, default is the current update.
         '''
-        self.update_id += 1
-        await self.current_update.message.reply_text(message)
-        user = self.current_update.message.from_user.username
+        update = update or self.current_update
+        await update.message.reply_text(message)
+        user = update.message.from_user.username
         self.logger.info(f'It has replied to: {user}. The message is: {message}')
 
 
-    def get_current_usser(self) -> dict:
+    def get_current_usser(self, update: Update = None) -> dict:
         '''
-        Returns a dictionary representing the current user who sent the message.
+        Returns a dictionary representing the user who sent the message.
+
+        Parameters:
+        -----------
+            update: Update
+                The update sent by the user, default is the current update.
 
         Returns:
         --------
@@ -257,11 +402,55 @@ class TelegramBot:
                         language_code: str or None
                     }
         '''
-        return self.current_update.message.from_user.to_dict()
+        update = update or self.current_update
+        return update.message.from_user.to_dict()
+
+
+    def ignore_current_message(self, update: Update = None) -> NoReturn:
+        '''
+        Ignore current message beacuse the menssage isnt support. The update
+        was already acknowledged when it was received.
+
+        Parameters:
+        -----------
+            update: Update
+                The update to ignore, default is the current update.
+        '''
+        update = update or self.current_update
+        self.logger.debug(f'Ignored update: {update.update_id}.')
+
+
+    async def set_webhook(self, url: str, secret: str = None) -> NoReturn:
+        '''
+        Tells Telegram to POST the updates to a webhook instead of waiting for
+        them to be polled.
+
+        Parameters:
+        -----------
+            url: str
+                The public HTTPS URL of the webhook.
+            secret: str
+                The token Telegram sends in every request, None for no token.
+        '''
+        await self.bot.set_webhook(url, secret_token=secret)
+        self.logger.info(f'Webhook set to: {url}')
+
+
+    async def delete_webhook(self) -> NoReturn:
+        '''
+        Removes the webhook, so the updates can be polled again.
+        '''
+        await self.bot.delete_webhook()
+        self.logger.info('Webhook deleted.')
 
 
-    def ignore_current_message(self) -> NoReturn:
+    def stats(self) -> dict:
         '''
-        Ignore current message beacuse the menssage isnt support.
+        Returns the counters of the uploads.
+
+        Returns:
+        --------
+            dict:
+                {'file_ids': int, 'reused': int, 'uploaded': int}
         '''
-        self.update_id += 1
+        return {'file_ids': len(self.file_ids), 'reused': self.reused, 'uploaded': self.uploaded}
@@ -1,9 +1,39 @@
 import re
 import os
-import requests
+import time
+import asyncio
 import warnings
-from typing import NoReturn
+import httpx
+from typing import Any, Awaitable, Callable, NoReturn, Union
 from weatherstack_api_error import WeatherStackAPIError
+from weather_report import WeatherReport
+from weather_cache import WeatherCache
+from geo_cache import GeoCache
+from single_flight import SingleFlight
+from persistent_cache import PersistentCache
+from executor import Executor
+from resilience import Resilience
+from weather_unavailable_error import WeatherUnavailableError
+
+'''
+Constants
+---------
+    The default settings of the AsyncWeatherApi HTTP client.
+'''
+WEATHER_API_DEFAULT_TIMEOUT = 10.0
+WEATHER_API_DEFAULT_CONNECT_TIMEOUT = 5.0
+WEATHER_API_DEFAULT_MAX_CONNECTIONS = 20
+WEATHER_API_DEFAULT_MAX_KEEPALIVE = 10
+WEATHER_API_DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+'''
+Constants
+---------
+    The bulk queries of weatherstack: the maximum number of locations of a
+    single call and the separator of the locations in the query.
+'''
+WEATHER_API_BULK_MAX = 10
+WEATHER_API_BULK_SEPARATOR = ';'
 
 
 class WeatherApi:
@@ -29,10 +59,22 @@ class WeatherApi:
             Returns the base url for the API call based on http and domain values.
         check_query(query: str) -> bool:
             Checks if a query is valid for the API call.
+        build_params(query: str) -> dict:
+            Returns the parameters of the API call for a given query.
         get_weather(query: str) -> NoReturn:
             Calls the API to fetch weather data for a given query.
-        parser_request() -> dict:
-            Parses the JSON response from the API call into a dictionary of relevant information.
+        get_weather_many(queries: list) -> dict:
+            Calls the API with bulk queries and returns the weather data of every query.
+        chunk_queries(queries: list, size: int = WEATHER_API_BULK_MAX) -> list:
+            Splits the queries in chunks of a bulk call.
+        parse_bulk_response(queries: list, response: Union[dict, list]) -> dict:
+            Parses the response of a bulk call into the result of every query.
+        parser_request() -> WeatherReport:
+            Parses the JSON response from the API call into a WeatherReport.
+        parse_response(response: dict) -> WeatherReport:
+            Parses a JSON response from the API into a WeatherReport.
+        check_response(response: dict) -> NoReturn:
+            Raises a WeatherStackAPIError exception if the response is an error.
         clean_request() -> NoReturn:
             Cleans up the request attribute after parsing the JSON response.
         raise_weather_stack_exception() -> NoReturn:
@@ -109,6 +151,26 @@ class WeatherApi:
         return bool(regex.match(query))
 
 
+    def build_params(self, query: str) -> dict:
+        '''
+        Returns the parameters of the API call for a given query.
+
+        Parameters
+        ----------
+            query : str
+                The query string to retrieve weather data for.
+
+        Returns
+        -------
+            dict
+                The query parameters of the API call.
+        '''
+        access_key = os.environ.get('WEATHERSTACK_TOKEN')
+        return {'query': query,
+                'access_key': access_key,
+                'units': self.unit}
+
+
     def get_weather(self, query: str) -> NoReturn:
         '''
         Calls the API to fetch weather data for a given query.
@@ -118,63 +180,170 @@ class WeatherApi:
             query : str
                 The query string to retrieve weather data for.
         '''
-        access_key = os.environ.get('WEATHERSTACK_TOKEN')
-        params = {'query': query,
-                  'access_key': access_key,
-                  'units': self.unit}
-        request = requests.get(self.base_url(), params=params)
+        # requests is only needed by the blocking calls, the bot uses httpx.
+        import requests
+
+        request = requests.get(self.base_url(), params=self.build_params(query),
+                               timeout=WEATHER_API_DEFAULT_TIMEOUT)
         self.request = request.json()
 
         if 'success' in self.request.keys():
             self.raise_weather_stack_exception()
 
 
-    def parser_request(self) -> dict:
+    def get_weather_many(self, queries: list) -> dict:
+        '''
+        Calls the API with bulk queries, one call for every chunk of
+        WEATHER_API_BULK_MAX queries, and returns the weather data of every
+        query. An error only affects the queries that caused it.
+
+        Parameters
+        ----------
+            queries : list
+                The query strings to retrieve weather data for.
+
+        Returns
+        -------
+            dict
+                The result of every query, a WeatherReport or the
+                exception that the query raised.
+        '''
+        import requests
+
+        results = {}
+        for chunk in self.chunk_queries(queries):
+            try:
+                params = self.build_params(WEATHER_API_BULK_SEPARATOR.join(chunk))
+                response = requests.get(self.base_url(), params=params,
+                                        timeout=WEATHER_API_DEFAULT_TIMEOUT).json()
+                results.update(self.parse_bulk_response(chunk, response))
+            except (WeatherStackAPIError, requests.RequestException, KeyError, TypeError,
+                    ValueError) as error:
+                results.update({query: error for query in chunk})
+        return results
+
+
+    @staticmethod
+    def chunk_queries(queries: list, size: int = WEATHER_API_BULK_MAX) -> list:
+        '''
+        Splits the queries in chunks of a bulk call, without repeated queries.
+
+        Parameters
+        ----------
+            queries : list
+                The query strings.
+            size : int
+                The maximum number of queries of a chunk.
+
+        Returns
+        -------
+            list
+                The chunks, lists of query strings.
         '''
-        Parses the JSON response from the API request into a dictionary of weather data.
+        queries = list(dict.fromkeys(queries))
+        return [queries[start:start + size] for start in range(0, len(queries), size)]
+
+
+    @classmethod
+    def parse_bulk_response(cls, queries: list, response: Union[dict, list]) -> dict:
+        '''
+        Parses the response of a bulk call into the result of every query. The
+        API answers with an array in the order of the queries, an element can
+        be the error of its query. A single object is the answer of a call
+        with one query, or an error of the whole call.
+
+        Parameters
+        ----------
+            queries : list
+                The query strings of the call.
+            response : Union[dict, list]
+                The JSON response of the API.
 
         Returns
         -------
             dict
-                A dictionary of weather data.
-        '''
-        location = self.request.get('location', {})
-        current = self.request.get('current', {})
-
-        return {'country': location['country'],
-                'localtime': location['localtime_epoch'],
-                'region': location['name'],
-                'lon': location['lon'],
-                'lat': location['lat'],
-                'temperature': current['temperature'],
-                'weather_code': current['weather_code'],
-                'weather_descriptions': current['weather_descriptions'],
-                'wind_speed': current['wind_speed'],
-                'wind_degree': current['wind_degree'],
-                'wind_dir': current['wind_dir'],
-                'pressure': current['pressure'],
-                'precip': current['precip'],
-                'humidity': current['humidity'],
-                'cloudcover': current['cloudcover'],
-                'feelslike': current['feelslike'],
-                'uv_index': current['uv_index'],
-                'visibility': current['visibility'],
-                'is_day': current['is_day'] == 'yes'}
+                The result of every query, a WeatherReport or the
+                error of the query: its WeatherStackAPIError, or the KeyError,
+                TypeError or ValueError of a malformed result.
+
+        Raises
+        ------
+            WeatherStackAPIError: if the whole call failed.
+            ValueError: if the response does not match the queries.
+        '''
+        if isinstance(response, dict):
+            cls.check_response(response)
+            response = [response]
+
+        if len(response) != len(queries):
+            raise ValueError(f'The response has {len(response)} results for {len(queries)} queries.')
+
+        results = {}
+        for query, element in zip(queries, response):
+            try:
+                cls.check_response(element)
+                results[query] = cls.parse_response(element)
+            except (WeatherStackAPIError, KeyError, TypeError, ValueError) as error:
+                results[query] = error
+        return results
+
+
+    def parser_request(self) -> WeatherReport:
+        '''
+        Parses the JSON response from the API request into a WeatherReport.
+
+        Returns
+        -------
+            WeatherReport
+                The weather data.
+        '''
+        return self.parse_response(self.request)
+
+
+    @staticmethod
+    def parse_response(response: dict) -> WeatherReport:
+        '''
+        Parses a JSON response from the API into a WeatherReport.
+
+        Parameters
+        ----------
+            response : dict
+                The JSON response of the API.
+
+        Returns
+        -------
+            WeatherReport
+                The weather data.
+        '''
+        return WeatherReport.from_payload(response)
 
 
     def clean_request(self) -> NoReturn:
         '''
         Cleans up the request attribute after parsing the JSON response.
         '''
-        request = None
+        self.request = None
 
 
     def raise_weather_stack_exception(self) -> NoReturn:
         '''
         Raises a WeatherStackAPIError exception if the API call was unsuccessful.
         '''
-        success = self.request.get('success', True)
-        error = self.request.get('error', {})
+        self.check_response(self.request)
+
+
+    @staticmethod
+    def check_response(response: dict) -> NoReturn:
+        '''
+        Raises a WeatherStackAPIError exception if the response is an error.
+
+        Parameters
+        ----------
+            response : dict
+                The JSON response of the API.
+        '''
+        success = response.get('success', True)
+        error = response.get('error', {})
 
         if not success:
             raise WeatherStackAPIError(
@@ -182,3 +351,425 @@ class WeatherApi:
                 error_type=error['type'],
                 info=error['info']
             )
+
+
+class AsyncWeatherApi(WeatherApi):
+    '''
+    An async variant of WeatherApi built on a shared httpx.AsyncClient, with
+    connection pooling and keep-alive. It returns the parsed result of every
+    call instead of storing it, so it is safe to use from concurrent tasks.
+
+    Attributes
+    ----------
+        client : httpx.AsyncClient
+            The HTTP client shared by every call.
+        cache : WeatherCache
+            The cache in front of the API, None disables it.
+        geo_cache : GeoCache
+            The cache for the coordinates lookups, None disables it.
+        flight : SingleFlight
+            Coalesces the identical calls in flight, None disables it.
+        store : PersistentCache
+            The cache on disk shared by restarts and processes, None disables it.
+        executor : Executor
+            Runs the calls to the store in the database thread, None runs
+            them in the event loop.
+        resilience : Resilience
+            Retries, deadline and circuit breaker of the API calls, None
+            disables them.
+        refreshes : set
+            The background refreshes of the stale entries served.
+
+    Methods
+    -------
+        __init__(unit='m', http=True, http2=False, timeout=WEATHER_API_DEFAULT_TIMEOUT,
+                 connect_timeout=WEATHER_API_DEFAULT_CONNECT_TIMEOUT,
+                 max_connections=WEATHER_API_DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive=WEATHER_API_DEFAULT_MAX_KEEPALIVE,
+                 keepalive_expiry=WEATHER_API_DEFAULT_KEEPALIVE_EXPIRY, cache=None,
+                 geo_cache=None, flight=None, store=None, executor=None,
+                 resilience=None) -> NoReturn:
+            Constructor for the AsyncWeatherApi class.
+        fetch_response(query: str) -> dict:
+            Calls the API and returns the JSON response.
+        fetch_bulk_response(queries: list) -> Union[dict, list]:
+            Calls the API with a bulk query and returns the JSON response.
+        get_weather(query: str) -> WeatherReport:
+            Returns the parsed weather data, from the cache if it is fresh or stale.
+        get_weather_at(lat: float, lon: float) -> WeatherReport:
+            Returns the parsed weather data of a coordinate, from the cache of its cell if it is fresh or stale.
+        get_weather_many(queries: list, refresh=False, size=WEATHER_API_BULK_MAX) -> dict:
+            Returns the weather data of every query, with bulk calls for the ones not in the cache.
+        close() -> NoReturn:
+            Closes the connections of the HTTP client.
+    '''
+
+    def __init__(self, unit: str = 'm', http: bool = True, http2: bool = False,
+                 timeout: float = WEATHER_API_DEFAULT_TIMEOUT,
+                 connect_timeout: float = WEATHER_API_DEFAULT_CONNECT_TIMEOUT,
+                 max_connections: int = WEATHER_API_DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive: int = WEATHER_API_DEFAULT_MAX_KEEPALIVE,
+                 keepalive_expiry: float = WEATHER_API_DEFAULT_KEEPALIVE_EXPIRY,
+                 cache: WeatherCache = None, geo_cache: GeoCache = None,
+                 flight: SingleFlight = None, store: PersistentCache = None,
+                 executor: Executor = None, resilience: Resilience = None) -> NoReturn:
+        '''
+        Constructor for the AsyncWeatherApi class.
+
+        Parameters
+        ----------
+            unit str :
+                Unit of measurement to use for temperature, see WeatherApi.
+            http bool :
+                Whether to use http or https for the API call. Default is True.
+            http2 bool :
+                Whether to use HTTP/2, it is only negotiated over https.
+            timeout float :
+                Seconds to wait for the response of the API.
+            connect_timeout float :
+                Seconds to wait for a new connection.
+            max_connections int :
+                Maximum number of connections open at the same time.
+            max_keepalive int :
+                Maximum number of idle connections kept alive.
+            keepalive_expiry float :
+                Seconds an idle connection is kept alive.
+            cache WeatherCache :
+                The cache in front of the API, default None for no cache.
+            geo_cache GeoCache :
+                The cache for the coordinates lookups, default None for no cache.
+            flight SingleFlight :
+                Coalesces the identical calls in flight, default None.
+            store PersistentCache :
+                The cache on disk, default None for no cache.
+            executor Executor :
+                Runs the calls to the store, default None.
+            resilience Resilience :
+                Retries, deadline and circuit breaker of the API calls, default None.
+
+        Raises
+        ------
+            AssertionError: if the unit parameter is not one of 'm', 's', or 'f'.
+        '''
+        super().__init__(unit, http)
+
+        if http2 and http:
+            warnings.warn('HTTP/2 is only used over https.')
+
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_keepalive,
+                              keepalive_expiry=keepalive_expiry)
+        self.client = httpx.AsyncClient(http2=http2, limits=limits,
+                                        timeout=httpx.Timeout(timeout, connect=connect_timeout))
+        self.cache = cache
+        self.geo_cache = geo_cache
+        self.flight = flight
+        self.store = store
+        self.executor = executor
+        self.resilience = resilience
+        self.refreshes = set()
+
+
+    async def fetch_response(self, query: str) -> dict:
+        '''
+        Calls the API and returns the JSON response for a given query.
+
+        Parameters
+        ----------
+            query : str
+                The query string to retrieve weather data for.
+
+        Returns
+        -------
+            dict
+                The JSON response of the API.
+
+        Raises
+        ------
+            WeatherStackAPIError: if the API returns an error.
+            WeatherUnavailableError: if the API cannot be reached.
+        '''
+        return await self.__call_api__(query)
+
+
+    async def fetch_bulk_response(self, queries: list) -> Union[dict, list]:
+        '''
+        Calls the API with a bulk query and returns the JSON response, an
+        array with an element for every query.
+
+        Parameters
+        ----------
+            queries : list
+                The query strings, at most WEATHER_API_BULK_MAX.
+
+        Returns
+        -------
+            Union[dict, list]
+                The JSON response of the API.
+
+        Raises
+        ------
+            WeatherStackAPIError: if the whole call failed.
+            WeatherUnavailableError: if the API cannot be reached.
+        '''
+        return await self.__call_api__(WEATHER_API_BULK_SEPARATOR.join(queries))
+
+
+    async def __call_api__(self, query: str) -> Union[dict, list]:
+        '''
+        Calls the API, through the resilience layer if there is one.
+
+        Parameters
+        ----------
+            query : str
+                The query of the API call.
+
+        Returns
+        -------
+            Union[dict, list]
+                The JSON response of the API.
+        '''
+        async def attempt() -> Union[dict, list]:
+            response = await self.client.get(self.base_url(), params=self.build_params(query))
+            response.raise_for_status()
+            response = response.json()
+            if isinstance(response, dict):
+                self.check_response(response)
+            return response
+
+        if self.resilience is None:
+            return await attempt()
+        return await self.resilience.call(attempt)
+
+
+    async def get_weather(self, query: str) -> WeatherReport:
+        '''
+        Returns the parsed weather data for a given query. If the cache has a
+        fresh entry for the query the API is not called.
+
+        Parameters
+        ----------
+            query : str
+                The query string to retrieve weather data for.
+
+        Returns
+        -------
+            WeatherReport
+                The weather data.
+
+        Raises
+        ------
+            WeatherStackAPIError: if the API returns an error.
+            WeatherUnavailableError: if the API cannot be reached.
+        '''
+        key = WeatherCache.key(query, self.unit)
+        return await self.__lookup__(self.cache, ('place',) + key, key, query)
+
+
+    async def get_weather_at(self, lat: float, lon: float) -> WeatherReport:
+        '''
+        Returns the parsed weather data for a coordinate. If the cell of the
+        coordinate has a fresh entry the API is not called.
+
+        Parameters
+        ----------
+            lat : float
+                The latitude.
+            lon : float
+                The longitude.
+
+        Returns
+        -------
+            WeatherReport
+                The weather data.
+
+        Raises
+        ------
+            WeatherStackAPIError: if the API returns an error.
+            WeatherUnavailableError: if the API cannot be reached.
+        '''
+        query = str(lat) + ',' + str(lon)
+        if self.geo_cache is None:
+            key = (query, self.unit)
+        else:
+            key = self.geo_cache.cell_key(lat, lon, self.unit)
+        return await self.__lookup__(self.geo_cache, ('cell',) + key, key, query)
+
+
+    async def get_weather_many(self, queries: list, refresh: bool = False,
+                               size: int = WEATHER_API_BULK_MAX) -> dict:
+        '''
+        Returns the weather data of every query. The queries without a fresh
+        entry in the cache are fetched with bulk calls, the chunks run at the
+        same time, and an error only affects the queries that caused it.
+
+        Parameters
+        ----------
+            queries : list
+                The query strings to retrieve weather data for.
+            refresh : bool
+                True to fetch every query, even the ones with a fresh entry.
+            size : int
+                The maximum number of queries of a call, 1 for the plans
+                without bulk queries.
+
+        Returns
+        -------
+            dict
+                The result of every query, in the order of the queries, a
+                WeatherReport or the exception that the query raised.
+        '''
+        queries = list(dict.fromkeys(queries))
+        results = {}
+        missing = []
+        for query in queries:
+            weather = None
+            if self.cache is not None and not refresh:
+                weather = self.cache.get(WeatherCache.key(query, self.unit))
+            if weather is None:
+                missing.append(query)
+            else:
+                results[query] = weather
+
+        chunks = self.chunk_queries(missing, size)
+        for chunk_results in await asyncio.gather(*(self.__fetch_chunk__(chunk) for chunk in chunks)):
+            results.update(chunk_results)
+
+        return {query: results[query] for query in queries}
+
+
+    async def __fetch_chunk__(self, queries: list) -> dict:
+        '''
+        Fetches a chunk of queries with a bulk call and stores the results in
+        the cache.
+
+        Parameters
+        ----------
+            queries : list
+                The query strings, at most WEATHER_API_BULK_MAX.
+
+        Returns
+        -------
+            dict
+                The result of every query, a WeatherReport or the
+                exception that the query raised.
+        '''
+        try:
+            response = await self.fetch_bulk_response(queries)
+            results = self.parse_bulk_response(queries, response)
+        except (WeatherStackAPIError, WeatherUnavailableError, httpx.HTTPError, KeyError, TypeError,
+                ValueError) as error:
+            return {query: error for query in queries}
+
+        if self.cache is not None:
+            for query, weather in results.items():
+                if not isinstance(weather, Exception):
+                    self.cache.set(WeatherCache.key(query, self.unit), weather)
+        return results
+
+
+    async def __lookup__(self, cache: WeatherCache, flight_key: tuple, key: tuple,
+                         query: str) -> WeatherReport:
+        '''
+        Returns the fresh entry of the cache. Otherwise, through the single
+        flight, it looks for the response in the store and then calls the API,
+        and it stores the result in both caches. An expired entry that is
+        still within the stale ttl is returned right away, and it is refreshed
+        in the background.
+
+        Parameters
+        ----------
+            cache : WeatherCache
+                The cache of the lookup, or None.
+            flight_key : tuple
+                The key that identifies identical calls in flight.
+            key : tuple
+                The key of the entry in the cache.
+            query : str
+                The query string of the API call.
+
+        Returns
+        -------
+            WeatherReport
+                The weather data.
+        '''
+        if cache is not None:
+            weather = cache.get(key)
+            if weather is not None:
+                return weather
+
+        async def fetch() -> WeatherReport:
+            response = None
+            if self.store is not None:
+                store_key = self.store.key(flight_key)
+                response, fetched_at = await self.__run_store__(self.store.get, store_key)
+            if response is None:
+                response = await self.fetch_response(query)
+                fetched_at = time.time()
+                if self.store is not None:
+                    await self.__run_store__(self.store.set, store_key, response, fetched_at)
+
+            weather = self.parse_response(response)
+            if cache is not None:
+                # An entry of the store is only fresh for the rest of its ttl.
+                cache.set(key, weather, cache.ttl - (time.time() - fetched_at))
+            return weather
+
+        def run() -> Awaitable[WeatherReport]:
+            if self.flight is None:
+                return fetch()
+            return self.flight.do(flight_key, fetch)
+
+        if cache is not None:
+            weather = cache.get_stale(key)
+            if weather is not None:
+                refresh = asyncio.ensure_future(run())
+                self.refreshes.add(refresh)
+                refresh.add_done_callback(self.__refreshed__)
+                return weather
+
+        return await run()
+
+
+    def __refreshed__(self, refresh: asyncio.Future) -> NoReturn:
+        '''
+        Forgets a finished background refresh. Its error is retrieved, the
+        stale entry is kept until the next refresh.
+
+        Parameters
+        ----------
+            refresh : asyncio.Future
+                The refresh that finished.
+        '''
+        self.refreshes.discard(refresh)
+        if not refresh.cancelled():
+            refresh.exception()
+
+
+    async def __run_store__(self, func: Callable, *args) -> Any:
+        '''
+        Runs a method of the store in the database thread of the executor.
+
+        Parameters
+        ----------
+            func : Callable
+                The method of the store.
+
+        Returns
+        -------
+            Any
+                The value returned by the method.
+        '''
+        if self.executor is None:
+            return func(*args)
+        return await self.executor.run_db(func, *args)
+
+
+    async def close(self) -> NoReturn:
+        '''
+        Closes the connections of the HTTP client, cancelling the background
+        refreshes.
+        '''
+        for refresh in list(self.refreshes):
+            refresh.cancel()
+        await self.client.aclose()
@@ -0,0 +1,248 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NoReturn
+
+'''
+Constants
+---------
+    The default settings of the WeatherCache class.
+'''
+WEATHER_CACHE_DEFAULT_TTL = 600
+WEATHER_CACHE_DEFAULT_STALE_TTL = 3600
+WEATHER_CACHE_DEFAULT_SIZE = 1024
+
+
+class WeatherCache:
+    '''
+    An in-memory cache for the weather responses, with a time to live for every
+    entry and a bounded size that evicts the least recently used entries.
+
+    Attributes
+    ----------
+        ttl : float
+            Seconds an entry is fresh.
+        stale_ttl : float
+            Seconds an expired entry can still be served while it is refreshed.
+        max_size : int
+            Maximum number of entries.
+        entries : OrderedDict
+            The entries by key, (expires, value), from the least to the most
+            recently used.
+        hits : int
+            Number of lookups that found a fresh entry.
+        misses : int
+            Number of lookups that did not find a fresh entry.
+        stale_hits : int
+            Number of expired entries served.
+        clock : Callable[[], float]
+            The function that returns the current time in seconds.
+
+    Methods
+    -------
+        __init__(ttl=WEATHER_CACHE_DEFAULT_TTL, max_size=WEATHER_CACHE_DEFAULT_SIZE,
+                 clock=time.monotonic, stale_ttl=WEATHER_CACHE_DEFAULT_STALE_TTL) -> NoReturn:
+            Constructor for the WeatherCache class.
+        normalize_query(query: str) -> str:
+            Returns the normalized form of a query.
+        key(query: str, unit: str) -> tuple:
+            Returns the cache key of a query and a unit.
+        get(key) -> Any:
+            Returns the fresh value of a key, None if there is not one.
+        get_stale(key) -> Any:
+            Returns the expired value of a key that can still be served.
+        remaining(key) -> float:
+            Returns the seconds an entry is still fresh.
+        set(key, value, ttl=None) -> NoReturn:
+            Stores a value, evicting the least recently used entry if it is full.
+        clear() -> NoReturn:
+            Removes every entry.
+        stats() -> dict:
+            Returns the counters of the cache.
+    '''
+
+    def __init__(self, ttl: float = WEATHER_CACHE_DEFAULT_TTL,
+                 max_size: int = WEATHER_CACHE_DEFAULT_SIZE,
+                 clock: Callable[[], float] = time.monotonic,
+                 stale_ttl: float = WEATHER_CACHE_DEFAULT_STALE_TTL) -> NoReturn:
+        '''
+        Constructor for the WeatherCache class.
+
+        Parameters
+        ----------
+            ttl : float
+                Seconds an entry is fresh.
+            max_size : int
+                Maximum number of entries.
+            clock : Callable[[], float]
+                The function that returns the current time in seconds.
+            stale_ttl : float
+                Seconds an expired entry can still be served, 0 disables it.
+
+        Raises
+        ------
+            AssertionError: if the size is lower than one.
+        '''
+        assert max_size >= 1, 'The cache needs room for one entry.'
+
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.clock = clock
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        '''
+        Returns the normalized form of a query, in lower case and with single
+        spaces between words.
+
+        Parameters
+        ----------
+            query : str
+                The query sent by the user.
+
+        Returns
+        -------
+            str
+                The normalized query.
+        '''
+        return ' '.join(query.lower().split())
+
+
+    @classmethod
+    def key(cls, query: str, unit: str) -> tuple:
+        '''
+        Returns the cache key of a query and a unit.
+
+        Parameters
+        ----------
+            query : str
+                The query sent by the user.
+            unit : str
+                The unit of the API call.
+
+        Returns
+        -------
+            tuple
+                The key of the entry.
+        '''
+        return (cls.normalize_query(query), unit)
+
+
+    def get(self, key: Hashable) -> Any:
+        '''
+        Returns the fresh value of a key.
+
+        Parameters
+        ----------
+            key : Hashable
+                The key of the entry.
+
+        Returns
+        -------
+            Any
+                The value, None if there is not a fresh entry.
+        '''
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+
+    def get_stale(self, key: Hashable) -> Any:
+        '''
+        Returns the value of an expired entry that is still within the stale
+        ttl, it is served while the entry is refreshed.
+
+        Parameters
+        ----------
+            key : Hashable
+                The key of the entry.
+
+        Returns
+        -------
+            Any
+                The value, None if there is not an entry that can be served.
+        '''
+        entry = self.entries.get(key)
+        if entry is None or entry[0] + self.stale_ttl <= self.clock():
+            return None
+
+        self.entries.move_to_end(key)
+        self.stale_hits += 1
+        return entry[1]
+
+
+    def remaining(self, key: Hashable) -> float:
+        '''
+        Returns the seconds an entry is still fresh, without counting it as a
+        lookup.
+
+        Parameters
+        ----------
+            key : Hashable
+                The key of the entry.
+
+        Returns
+        -------
+            float
+                The seconds until the entry expires, negative if it expired,
+                None if there is not an entry.
+        '''
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry[0] - self.clock()
+
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> NoReturn:
+        '''
+        Stores a value, evicting the least recently used entry if it is full.
+
+        Parameters
+        ----------
+            key : Hashable
+                The key of the entry.
+            value : Any
+                The value to store.
+            ttl : float
+                Seconds the entry is fresh, default the ttl of the cache.
+        '''
+        if ttl is None:
+            ttl = self.ttl
+        self.entries[key] = (self.clock() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+    def clear(self) -> NoReturn:
+        '''
+        Removes every entry.
+        '''
+        self.entries.clear()
+
+
+    def stats(self) -> dict:
+        '''
+        Returns the counters of the cache.
+
+        Returns
+        -------
+            dict
+                {'size': int, 'hits': int, 'misses': int, 'stale_hits': int}
+        '''
+        return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'stale_hits': self.stale_hits}
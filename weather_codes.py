@@ -0,0 +1,250 @@
+import marshal
+import os
+import tempfile
+from typing import NamedTuple, NoReturn
+from background import Background
+
+'''
+Constants
+---------
+    The condition codes of weatherstack and the compiled table kept next to
+    them, it is rebuilt when the codes or the rules change.
+'''
+WEATHER_CODES_DEFAULT_LOCATION = 'src/conditions_codes.xml'
+WEATHER_CODES_DEFAULT_CACHE = 'src/conditions_codes.marshal'
+
+'''
+Constants
+---------
+    Used to match the weather codes with the backgrounds, (day, night) by
+    code.
+'''
+WEATHER_CODES_SNOW = (371, 368, 338, 335, 332, 329, 326, 323, 230, 179, 227)
+WEATHER_CODES_THUNDER = (395, 392, 389, 200, 386)
+WEATHER_CODES_CLOUDY = (119, 116, 263, 266, 317)
+WEATHER_CODES_RAIN = (350, 374, 362, 284, 281, 182, 143, 122, 353, 296, 176, 311,
+                      293, 377, 320, 365, 359, 356, 305, 299, 185, 314, 308, 302)
+WEATHER_CODES_CLEAR = (113,)
+WEATHER_CODES_FOG = (260, 248)
+
+WEATHER_CODES_BACKGROUNDS = {code: (day, night) for codes, day, night in (
+    (WEATHER_CODES_SNOW, Background.BACKGROUND_SNOW, Background.BACKGROUND_SNOW),
+    (WEATHER_CODES_THUNDER, Background.BACKGROUND_THUNDER, Background.BACKGROUND_THUNDER),
+    (WEATHER_CODES_CLOUDY, Background.BACKGROUND_CLOUDY_DAY, Background.BACKGROUND_CLOUDY_NIGHT),
+    (WEATHER_CODES_RAIN, Background.BACKGROUND_RAINY, Background.BACKGROUND_RAINY),
+    (WEATHER_CODES_CLEAR, Background.BACKGROUND_SUNNY_DAY, Background.BACKGROUND_SKY_NIGHT),
+    (WEATHER_CODES_FOG, Background.BACKGROUND_FOG, Background.BACKGROUND_FOG)) for code in codes}
+
+'''
+Constants
+---------
+    The icon of the codes without one.
+'''
+WEATHER_CODES_UNKNOWN_ICON = 'unknown'
+
+
+class WeatherCondition(NamedTuple):
+    '''
+    What a card draws for a weather code, by day or by night.
+
+    Attributes
+    ----------
+        background : Background
+            The background of the card.
+        icon : str
+            The name of the icon, without the extension.
+        white_font : bool
+            True if the background is dark and the text is white.
+        description : str
+            The description of the code.
+    '''
+    background: Background
+    icon: str
+    white_font: bool
+    description: str
+
+
+class WeatherCodes:
+    '''
+    A table compiled once from the condition codes of weatherstack and the
+    background rules, so every lookup of the cards is a single dict access.
+    The compiled table is kept in a marshal file keyed by the modification
+    time of the codes, so the XML is only parsed when it changes.
+
+    Attributes
+    ----------
+        location : str
+            The XML file of the condition codes.
+        cache : str
+            The file of the compiled table, None does not keep it.
+        conditions : dict
+            The WeatherCondition of every (code, is_day).
+        descriptions : dict
+            The description, day icon and night icon of every code of the XML.
+
+    Methods
+    -------
+        __init__(location=WEATHER_CODES_DEFAULT_LOCATION, cache=WEATHER_CODES_DEFAULT_CACHE) -> NoReturn:
+            Loads the compiled table, compiling it if it is out of date.
+        compile(location: str) -> tuple:
+            Returns the rows of the table of an XML file.
+        lookup(code: int, is_day: bool) -> WeatherCondition:
+            Returns what a card draws for a code.
+    '''
+
+    def __init__(self, location: str = WEATHER_CODES_DEFAULT_LOCATION,
+                 cache: str = WEATHER_CODES_DEFAULT_CACHE) -> NoReturn:
+        '''
+        Loads the compiled table, it is compiled and saved when the cache is
+        missing or older than the codes.
+
+        Parameters
+        ----------
+            location : str
+                The XML file of the condition codes. You can download it from
+                https://weatherstack.com/site_resources/weatherstack-weather-condition-codes.zip
+            cache : str
+                The file of the compiled table, None compiles it every time.
+        '''
+        self.location = location
+        self.cache = cache
+
+        stat = os.stat(location)
+        key = (stat.st_mtime_ns, stat.st_size, repr(sorted(self.__rules__().items())))
+        rows = self.__load__(key)
+        if rows is None:
+            rows = self.compile(location)
+            self.__save__(key, rows)
+
+        self.conditions = {}
+        self.descriptions = {}
+        for code, description, day_icon, night_icon, day, night in rows:
+            self.descriptions[code] = (description, day_icon, night_icon)
+            for is_day, background in ((True, Background(day)), (False, Background(night))):
+                self.conditions[code, is_day] = WeatherCondition(background,
+                                                                 day_icon if is_day else night_icon,
+                                                                 background.is_dark(), description)
+
+
+    def __len__(self) -> int:
+        return len(self.descriptions)
+
+
+    @staticmethod
+    def __rules__() -> dict:
+        '''
+        Returns the background rules as plain values, they are part of the key
+        of the compiled table.
+
+        Returns
+        -------
+            dict
+                The (day, night) background values of every code.
+        '''
+        return {code: (day.value, night.value) for code, (day, night) in WEATHER_CODES_BACKGROUNDS.items()}
+
+
+    def __load__(self, key: tuple) -> tuple:
+        '''
+        Returns the rows of the compiled table if it is up to date.
+
+        Parameters
+        ----------
+            key : tuple
+                The key of the codes and the rules.
+
+        Returns
+        -------
+            tuple
+                The rows, None if there is not an up to date table.
+        '''
+        if self.cache is None:
+            return None
+        try:
+            with open(self.cache, 'rb') as fd:
+                cached_key, rows = marshal.load(fd)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return rows if cached_key == key else None
+
+
+    def __save__(self, key: tuple, rows: tuple) -> NoReturn:
+        '''
+        Saves the compiled table. It is written to a temporary file and then
+        renamed, so the other processes never read half a table. A read only
+        directory is ignored.
+
+        Parameters
+        ----------
+            key : tuple
+                The key of the codes and the rules.
+            rows : tuple
+                The rows of the table.
+        '''
+        if self.cache is None:
+            return
+        try:
+            fd, path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.cache)))
+            with os.fdopen(fd, 'wb') as file:
+                marshal.dump((key, rows), file)
+            os.replace(path, self.cache)
+        except OSError:
+            pass
+
+
+    @staticmethod
+    def compile(location: str) -> tuple:
+        '''
+        Returns the rows of the table of an XML file of condition codes,
+        joined with the background rules. The codes only in the rules get the
+        unknown icon, and the codes without rules get the unknown background.
+
+        Parameters
+        ----------
+            location : str
+                The XML file of the condition codes.
+
+        Returns
+        -------
+            tuple
+                (code, description, day icon, night icon, day background,
+                night background) of every code, the backgrounds by value.
+        '''
+        # xmltodict is only needed when the table is out of date.
+        import xmltodict
+
+        with open(location) as fd:
+            doc = xmltodict.parse(fd.read())
+
+        icons = {}
+        for condition in doc['codes']['condition']:
+            icons[int(condition['code'])] = (condition['description'], condition['day_icon'],
+                                             condition['night_icon'])
+
+        rows = []
+        unknown = (Background.BACKGROUND_UNKNOWN, Background.BACKGROUND_UNKNOWN)
+        for code in sorted(set(icons) | set(WEATHER_CODES_BACKGROUNDS)):
+            description, day_icon, night_icon = icons.get(code, ('', WEATHER_CODES_UNKNOWN_ICON,
+                                                                 WEATHER_CODES_UNKNOWN_ICON))
+            day, night = WEATHER_CODES_BACKGROUNDS.get(code, unknown)
+            rows.append((code, description, day_icon, night_icon, day.value, night.value))
+        return tuple(rows)
+
+
+    def lookup(self, code: int, is_day: bool) -> WeatherCondition:
+        '''
+        Returns what a card draws for a code.
+
+        Parameters
+        ----------
+            code : int
+                The weather code of weatherstack.
+            is_day : bool
+                True if it is day.
+
+        Returns
+        -------
+            WeatherCondition
+                The condition, None if the code is unknown.
+        '''
+        return self.conditions.get((code, bool(is_day)))
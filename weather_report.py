@@ -0,0 +1,319 @@
+from array import array
+from dataclasses import dataclass, fields
+from typing import Iterable, Iterator, NoReturn, Union
+
+'''
+Constants
+---------
+    The array typecode of every field of a WeatherReportBatch, None for the
+    fields kept in a list. A column falls back to a list when a value does not
+    fit its typecode, like the REAL or NULL values of old registers.
+'''
+WEATHER_REPORT_TYPECODES = {'country': None,
+                            'localtime': 'q',
+                            'region': None,
+                            'lon': 'd',
+                            'lat': 'd',
+                            'temperature': 'i',
+                            'weather_code': 'i',
+                            'weather_descriptions': None,
+                            'wind_speed': 'i',
+                            'wind_degree': 'i',
+                            'wind_dir': None,
+                            'pressure': 'i',
+                            'precip': 'd',
+                            'humidity': 'i',
+                            'cloudcover': 'i',
+                            'feelslike': 'i',
+                            'uv_index': 'i',
+                            'visibility': 'i',
+                            'is_day': 'b'}
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherReport:
+    '''
+    The weather of a place, parsed from a response of the WeatherStack API. It
+    is immutable and hashable, so it can be shared by the caches and used as a
+    key, and its slots keep every instance small.
+
+    Attributes
+    ----------
+        country : str
+            The country of the place.
+        localtime : int
+            The local time of the place, as an epoch.
+        region : str
+            The name of the place.
+        lon : float
+            The longitude of the place.
+        lat : float
+            The latitude of the place.
+        temperature : int
+            The temperature.
+        weather_code : int
+            The weather code of WeatherStack.
+        weather_descriptions : tuple
+            The descriptions of the weather.
+        wind_speed : int
+            The wind speed.
+        wind_degree : int
+            The wind direction in degrees.
+        wind_dir : str
+            The wind direction, like 'NNE'.
+        pressure : int
+            The pressure in MB.
+        precip : float
+            The precipitation in MM.
+        humidity : int
+            The humidity.
+        cloudcover : int
+            The cloud cover.
+        feelslike : int
+            The feels like temperature.
+        uv_index : int
+            The UV index.
+        visibility : int
+            The visibility.
+        is_day : bool
+            True if it is day in the place.
+
+    Methods
+    -------
+        from_payload(payload: dict) -> WeatherReport:
+            Returns the report of a JSON response of the API.
+        to_row() -> tuple:
+            Returns the fields in order, as stored in the database.
+    '''
+
+    country: str
+    localtime: int
+    region: str
+    lon: float
+    lat: float
+    temperature: int
+    weather_code: int
+    weather_descriptions: tuple
+    wind_speed: int
+    wind_degree: int
+    wind_dir: str
+    pressure: int
+    precip: float
+    humidity: int
+    cloudcover: int
+    feelslike: int
+    uv_index: int
+    visibility: int
+    is_day: bool
+
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> 'WeatherReport':
+        '''
+        Returns the report of a JSON response of the API.
+
+        Parameters
+        ----------
+            payload : dict
+                The JSON response of the API.
+
+        Returns
+        -------
+            WeatherReport
+                The report.
+        '''
+        location = payload.get('location', {})
+        current = payload.get('current', {})
+
+        return cls(location['country'],
+                   location['localtime_epoch'],
+                   location['name'],
+                   float(location['lon']),
+                   float(location['lat']),
+                   current['temperature'],
+                   current['weather_code'],
+                   tuple(current['weather_descriptions']),
+                   current['wind_speed'],
+                   current['wind_degree'],
+                   current['wind_dir'],
+                   current['pressure'],
+                   current['precip'],
+                   current['humidity'],
+                   current['cloudcover'],
+                   current['feelslike'],
+                   current['uv_index'],
+                   current['visibility'],
+                   current['is_day'] == 'yes')
+
+
+    def to_row(self) -> tuple:
+        '''
+        Returns the fields in order, with the descriptions joined with ', ' as
+        stored in the database.
+
+        Returns
+        -------
+            tuple
+                The fields of the report.
+        '''
+        return (self.country, self.localtime, self.region, self.lon, self.lat,
+                self.temperature, self.weather_code, ', '.join(self.weather_descriptions),
+                self.wind_speed, self.wind_degree, self.wind_dir, self.pressure,
+                self.precip, self.humidity, self.cloudcover, self.feelslike,
+                self.uv_index, self.visibility, self.is_day)
+
+
+class WeatherReportBatch:
+    '''
+    Many reports stored by column, the numeric fields in typed arrays and the
+    text fields in lists, so large result sets do not need an object for every
+    row. Extra columns, like the user of a register, are kept in lists, and so
+    is a numeric field with a value its array cannot hold.
+
+    Attributes
+    ----------
+        columns : dict
+            The values of every field and extra column.
+        extras : tuple
+            The names of the extra columns.
+
+    Methods
+    -------
+        __init__(extras=()) -> NoReturn:
+            Constructor for the WeatherReportBatch class.
+        from_rows(rows, extras=()) -> WeatherReportBatch:
+            Returns the batch of rows with the fields in order and then the extra columns.
+        append(report: WeatherReport, *extras) -> NoReturn:
+            Adds a report and its extra values.
+        column(name: str) -> Union[array, list]:
+            Returns the values of a field or an extra column.
+        report(index: int) -> WeatherReport:
+            Returns the report of a row.
+    '''
+
+    def __init__(self, extras: tuple = ()) -> NoReturn:
+        '''
+        Constructor for the WeatherReportBatch class.
+
+        Parameters
+        ----------
+            extras : tuple
+                The names of the extra columns.
+        '''
+        self.extras = tuple(extras)
+        self.columns = {name: ([] if typecode is None else array(typecode))
+                        for name, typecode in WEATHER_REPORT_TYPECODES.items()}
+        self.columns.update({name: [] for name in self.extras})
+
+
+    @classmethod
+    def from_rows(cls, rows: list, extras: tuple = ()) -> 'WeatherReportBatch':
+        '''
+        Returns the batch of rows with the fields in the order of
+        WeatherReport.to_row and then the extra columns.
+
+        Parameters
+        ----------
+            rows : list
+                The rows.
+            extras : tuple
+                The names of the extra columns.
+
+        Returns
+        -------
+            WeatherReportBatch
+                The batch.
+        '''
+        batch = cls(extras)
+        if rows:
+            names = list(batch.columns)
+            for name, values in zip(names, zip(*rows)):
+                if name == 'weather_descriptions':
+                    values = [tuple(value.split(', ')) for value in values]
+                batch.__extend__(name, values)
+        return batch
+
+
+    def __len__(self) -> int:
+        return len(self.columns['region'])
+
+
+    def __iter__(self) -> Iterator[WeatherReport]:
+        return (self.report(index) for index in range(len(self)))
+
+
+    def append(self, report: WeatherReport, *extras) -> NoReturn:
+        '''
+        Adds a report and its extra values.
+
+        Parameters
+        ----------
+            report : WeatherReport
+                The report.
+            extras : Any
+                The values of the extra columns, in order.
+        '''
+        for field in fields(WeatherReport):
+            self.__extend__(field.name, (getattr(report, field.name),))
+        for name, value in zip(self.extras, extras):
+            self.columns[name].append(value)
+
+
+    def __extend__(self, name: str, values: Iterable) -> NoReturn:
+        '''
+        Adds values to a column. If the array of the column cannot hold one of
+        them, the column is turned into a list with all its values.
+
+        Parameters
+        ----------
+            name : str
+                The name of the field or the extra column.
+            values : Iterable
+                The values, in order.
+        '''
+        column = self.columns[name]
+        if isinstance(column, array):
+            values = list(values)
+            try:
+                # A new array first, so a failed extend leaves the column as it was.
+                column.extend(array(column.typecode, values))
+                return
+            except (TypeError, OverflowError):
+                column = self.columns[name] = column.tolist()
+        column.extend(values)
+
+
+    def column(self, name: str) -> Union[array, list]:
+        '''
+        Returns the values of a field or an extra column.
+
+        Parameters
+        ----------
+            name : str
+                The name of the field or the extra column.
+
+        Returns
+        -------
+            Union[array, list]
+                The values, in the order of the rows.
+        '''
+        return self.columns[name]
+
+
+    def report(self, index: int) -> WeatherReport:
+        '''
+        Returns the report of a row.
+
+        Parameters
+        ----------
+            index : int
+                The index of the row.
+
+        Returns
+        -------
+            WeatherReport
+                The report.
+        '''
+        values = [self.columns[name][index] for name in WEATHER_REPORT_TYPECODES]
+        values[-1] = bool(values[-1])
+        return WeatherReport(*values)
@@ -0,0 +1,22 @@
+class WeatherUnavailableError(Exception):
+    '''
+    Custom Exception raised when the WeatherStack API cannot be reached: it
+    timed out, it kept failing after the retries or the circuit breaker is open.
+
+    Attributes
+    ----------
+        info : str
+            A detailed error message.
+    '''
+
+    def __init__(self, info: str):
+        '''
+        Initializes a new instance of the WeatherUnavailableError class.
+
+        Parameters
+        ----------
+            info : str
+                A detailed error message.
+        '''
+        self.info = info
+        super().__init__(self.info)
@@ -0,0 +1,261 @@
+import asyncio
+import hmac
+import json
+import h11
+from typing import Awaitable, Callable, NoReturn
+from telegram import Update
+from telegram_bot import TelegramBot, MessageType
+
+'''
+Constants
+---------
+    The default address where the webhook server listens.
+'''
+WEBHOOK_DEFAULT_HOST = '0.0.0.0'
+WEBHOOK_DEFAULT_PORT = 8443
+WEBHOOK_DEFAULT_PATH = '/telegram'
+
+'''
+Constants
+---------
+    The constants used in the WebhookServer class.
+'''
+WEBHOOK_SECRET_HEADER = b'x-telegram-bot-api-secret-token'
+WEBHOOK_MAX_BODY_SIZE = 1024 * 1024
+WEBHOOK_READ_SIZE = 64 * 1024
+WEBHOOK_IDLE_TIMEOUT = 60
+
+
+class WebhookServer:
+    '''
+    This class implements a lightweight asyncio HTTP server that receives the
+    updates that Telegram POSTs to the webhook of the bot.
+
+    Attributes
+    ----------
+        bot : TelegramBot
+            The bot used to build and classify the received updates.
+        on_update : Callable[[MessageType, Update], Awaitable[None]]
+            The coroutine function called with every valid update.
+        secret : str
+            The secret token that Telegram sends in the
+            X-Telegram-Bot-Api-Secret-Token header, None disables the check.
+        host : str
+            The address where the server listens.
+        port : int
+            The port where the server listens.
+        path : str
+            The URL path that accepts the updates.
+        logger : Logger
+            The logger used to log the requests.
+        server : asyncio.Server
+            The running server, None until start is called.
+
+    Methods
+    -------
+        __init__(bot, on_update, secret=None, host=WEBHOOK_DEFAULT_HOST,
+                 port=WEBHOOK_DEFAULT_PORT, path=WEBHOOK_DEFAULT_PATH) -> NoReturn:
+            Constructor for the WebhookServer class.
+        start() -> NoReturn:
+            Starts listening for connections.
+        serve_forever() -> NoReturn:
+            Starts the server and serves until it is cancelled.
+        close() -> NoReturn:
+            Stops the server.
+        handle_body(body: bytes) -> int:
+            Builds the update from a request body and passes it to on_update.
+    '''
+
+    def __init__(self, bot: TelegramBot,
+                 on_update: Callable[[MessageType, Update], Awaitable[None]],
+                 secret: str = None, host: str = WEBHOOK_DEFAULT_HOST,
+                 port: int = WEBHOOK_DEFAULT_PORT, path: str = WEBHOOK_DEFAULT_PATH) -> NoReturn:
+        '''
+        Constructor for the WebhookServer class.
+
+        Parameters
+        ----------
+            bot : TelegramBot
+                The bot used to build and classify the received updates.
+            on_update : Callable[[MessageType, Update], Awaitable[None]]
+                The coroutine function called with every valid update.
+            secret : str
+                The secret token expected in the requests, None disables the check.
+            host : str
+                The address where the server listens.
+            port : int
+                The port where the server listens.
+            path : str
+                The URL path that accepts the updates.
+        '''
+        self.bot = bot
+        self.on_update = on_update
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path
+        self.logger = bot.logger
+        self.server = None
+
+
+    async def start(self) -> NoReturn:
+        '''
+        Starts listening for connections.
+        '''
+        self.server = await asyncio.start_server(self.__handle_connection__, self.host, self.port)
+        self.logger.info(f'Listening for webhook updates on {self.host}:{self.port}{self.path}')
+
+
+    async def serve_forever(self) -> NoReturn:
+        '''
+        Starts the server and serves until it is cancelled.
+        '''
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+
+    async def close(self) -> NoReturn:
+        '''
+        Stops the server.
+        '''
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+    async def handle_body(self, body: bytes) -> int:
+        '''
+        Builds the update from a request body and passes it to on_update.
+
+        Parameters
+        ----------
+            body : bytes
+                The JSON Update sent by Telegram.
+
+        Returns
+        -------
+            int
+                The HTTP status code of the response, 400 for an invalid
+                update and 500 if on_update failed.
+        '''
+        try:
+            data = json.loads(body)
+            if not isinstance(data, dict):
+                raise TypeError('The update is not a JSON object.')
+            update = Update.de_json(data, self.bot.bot)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            self.logger.warning('Webhook received an invalid update.')
+            return 400
+
+        if update is None:
+            return 400
+
+        try:
+            message = await self.bot.classify_update(update)
+            await self.on_update(message, update)
+        except Exception:
+            self.logger.exception(f'Webhook failed to handle the update {update.update_id}.')
+            return 500
+        return 200
+
+
+    def __check_request__(self, request: h11.Request) -> int:
+        '''
+        Checks the method, path, declared size and secret token of a request.
+
+        Parameters
+        ----------
+            request : h11.Request
+                The request to check.
+
+        Returns
+        -------
+            int
+                200 if the request is accepted, otherwise the HTTP error code.
+        '''
+        if request.target.split(b'?')[0].decode('latin-1') != self.path:
+            return 404
+        if request.method != b'POST':
+            return 405
+        for name, value in request.headers:
+            if name == b'content-length' and int(value) > WEBHOOK_MAX_BODY_SIZE:
+                return 413
+        if self.secret is not None:
+            token = b''
+            for name, value in request.headers:
+                if name == WEBHOOK_SECRET_HEADER:
+                    token = value
+            if not hmac.compare_digest(token, self.secret.encode()):
+                return 403
+        return 200
+
+
+    async def __handle_connection__(self, reader: asyncio.StreamReader,
+                                    writer: asyncio.StreamWriter) -> NoReturn:
+        '''
+        Serves the requests of a connection, keeping it alive between requests.
+
+        Parameters
+        ----------
+            reader : asyncio.StreamReader
+                The stream to read the requests.
+            writer : asyncio.StreamWriter
+                The stream to write the responses.
+        '''
+        connection = h11.Connection(h11.SERVER, max_incomplete_event_size=WEBHOOK_MAX_BODY_SIZE)
+        try:
+            while True:
+                status, body = 200, bytearray()
+                request = None
+
+                while True:
+                    event = connection.next_event()
+                    if event is h11.NEED_DATA:
+                        data = await asyncio.wait_for(reader.read(WEBHOOK_READ_SIZE),
+                                                      WEBHOOK_IDLE_TIMEOUT)
+                        connection.receive_data(data)
+                        continue
+                    if isinstance(event, h11.Request):
+                        request = event
+                        status = self.__check_request__(request)
+                    elif isinstance(event, h11.Data):
+                        if len(body) + len(event.data) > WEBHOOK_MAX_BODY_SIZE:
+                            status = 413
+                        else:
+                            body += event.data
+                    elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                        break
+                    if status != 200:
+                        # A rejected request is answered without reading the
+                        # rest of its body, and the connection is closed.
+                        break
+
+                if isinstance(event, h11.ConnectionClosed):
+                    return
+
+                if status == 200:
+                    status = await self.handle_body(bytes(body))
+                else:
+                    target = request.target.decode('latin-1')
+                    self.logger.warning(f'Webhook rejected request to {target} with status {status}.')
+
+                close = not isinstance(event, h11.EndOfMessage)
+                headers = [('Content-Length', '0')]
+                if close:
+                    headers.append(('Connection', 'close'))
+                writer.write(connection.send(h11.Response(status_code=status, headers=headers)))
+                writer.write(connection.send(h11.EndOfMessage()))
+                await writer.drain()
+
+                if close or connection.our_state is h11.MUST_CLOSE:
+                    return
+                connection.start_next_cycle()
+        except (h11.RemoteProtocolError, asyncio.TimeoutError, ConnectionError):
+            pass
+        except h11.LocalProtocolError as error:
+            self.logger.warning(f'Webhook could not answer a request: {error}')
+        finally:
+            writer.close()
@@ -1,9 +1,12 @@
-import xmltodict
 import warnings
+import glob
+import math
 import os
+import pixie
 from enum import Enum
 from typing import Union
 from typing import NoReturn
+from weather_codes import WeatherCodes, WEATHER_CODES_UNKNOWN_ICON
 
 
 '''
@@ -38,6 +41,11 @@ class WSymbol:
             The path to the directory containing the icons.
         codes_dict : dict
             A dictionary containing the paths to the different icons.
+        codes : WeatherCodes
+            The compiled table of the weather codes.
+        scaled : dict
+            The icons already scaled to the sizes of the layout, by
+            (absolute path, scale), they must never be modified.
 
     Methods
     -------
@@ -58,6 +66,15 @@ class WSymbol:
 
         get_size() -> Union[int, int]:
             Get the size of a specific icon image.
+
+        get_scaled_symbol(path: str, scale: float) -> pixie.Image:
+            Get an icon scaled, it is only scaled the first time.
+
+        scale_image(image: pixie.Image, scale: float) -> pixie.Image:
+            Returns a scaled copy of an image.
+
+        preload(scales: tuple) -> NoReturn:
+            Scales every icon of the directory to the given scales.
     '''
 
 
@@ -77,6 +94,8 @@ class WSymbol:
             warnings.warn('WSymbol path not found.')
         self.__path__ = path
         self.codes_dict = {}
+        self.codes = None
+        self.scaled = {}
 
         self.parser_condition_codes(codes)
 
@@ -94,14 +113,12 @@ class WSymbol:
         if not os.path.isfile(codes_file):
             warnings.warn('Condition codes not found.')
 
-        with open(codes_file) as fd:
-            doc = xmltodict.parse(fd.read())
-        codes = doc['codes']['condition']
-
-        for code in codes:
-            self.codes_dict[int(code['code'])] = {'description': code['description'],
-                                                  'day_icon': code['day_icon'],
-                                                  'night_icon': code['night_icon']}
+        # The compiled table is only rebuilt from the XML when it changes.
+        self.codes = WeatherCodes(codes_file)
+        for code, (description, day_icon, night_icon) in self.codes.descriptions.items():
+            self.codes_dict[code] = {'description': description,
+                                     'day_icon': day_icon,
+                                     'night_icon': night_icon}
 
 
     def get_symbol_path_from_code(self, code: int, is_day: bool) -> str:
@@ -120,15 +137,11 @@ class WSymbol:
             str
                 The image path for the given code.
         '''
-        for cc, value in self.codes_dict.items():
-            if cc == code:
-                if is_day:
-                    return self.get_abs_path() + '/' + value['day_icon'] + WSYMBOL_EXTENSION
-                else:
-                    return self.get_abs_path() + '/' + value['night_icon'] + WSYMBOL_EXTENSION
-
-        warnings.warn('Unknown code: ' + str(code))
-        return self.get_abs_path() + '/' + 'unknown' + WSYMBOL_EXTENSION
+        condition = self.codes.lookup(code, is_day)
+        if condition is None:
+            warnings.warn('Unknown code: ' + str(code))
+            return self.get_abs_path() + '/' + WEATHER_CODES_UNKNOWN_ICON + WSYMBOL_EXTENSION
+        return self.get_abs_path() + '/' + condition.icon + WSYMBOL_EXTENSION
 
 
     def get_symbol_temp_from_code(self, tmp: int) -> str:
@@ -189,3 +202,67 @@ class WSymbol:
                 The size of the specified wsymbol image.
         '''
         return (WSYMBOL_WIDTH, WSYMBOL_HEIGHT)
+
+
+    def get_scaled_symbol(self, path: str, scale: float) -> pixie.Image:
+        '''
+        Get an icon scaled, so it is drawn without resampling it. It is read
+        and scaled the first time, the image is shared and must not be
+        modified.
+
+        Parameters
+        ----------
+            path : str
+                The path of the icon.
+            scale : float
+                The scale of the icon in the layout.
+
+        Returns
+        -------
+            pixie.Image
+                The scaled icon.
+        '''
+        key = (os.path.abspath(path), scale)
+        image = self.scaled.get(key)
+        if image is None:
+            image = self.scale_image(pixie.read_image(key[0]), scale)
+            self.scaled[key] = image
+        return image
+
+
+    @staticmethod
+    def scale_image(image: pixie.Image, scale: float) -> pixie.Image:
+        '''
+        Returns a scaled copy of an image, resampled as if it was drawn with
+        a scale transform.
+
+        Parameters
+        ----------
+            image : pixie.Image
+                The image, it is not modified.
+            scale : float
+                The scale of the copy.
+
+        Returns
+        -------
+            pixie.Image
+                The scaled image.
+        '''
+        scaled = pixie.Image(math.ceil(image.width * scale), math.ceil(image.height * scale))
+        scaled.draw(image, pixie.scale(scale, scale))
+        return scaled
+
+
+    def preload(self, scales: tuple) -> NoReturn:
+        '''
+        Scales every icon of the directory to the given scales, so the first
+        cards do not wait for it.
+
+        Parameters
+        ----------
+            scales : tuple
+                The scales used by the layouts.
+        '''
+        for path in glob.glob(os.path.join(self.get_abs_path(), '*' + WSYMBOL_EXTENSION)):
+            for scale in scales:
+                self.get_scaled_symbol(path, scale)